@@ -0,0 +1,6 @@
+"""
+Shared tooling for the 2024 Advent of Code solutions.
+
+Each ``day-XX/solution.py`` exposes ``parse(text)``, ``part1(parsed)`` and ``part2(parsed)``.
+Run them with ``python -m aoc`` from the ``2024`` directory.
+"""
@@ -0,0 +1,31 @@
+"""
+Implementation backends the solutions can choose between.
+
+The pure Python backend always works. The NumPy backend needs numpy installed, and solutions import it
+optionally so the rest of the tree runs without it. The C backend calls the C solvers of the days that have
+one, built as shared libraries, see ``aoc.cbackend``.
+"""
+
+import importlib.util
+
+PYTHON = "python"
+NUMPY = "numpy"
+C = "c"
+
+BACKENDS = (PYTHON, NUMPY, C)
+
+
+def check_backend(backend: str, supported: tuple[str, ...] = BACKENDS) -> str:
+    """
+    Make sure a backend is known to a solution and usable in this environment.
+
+    :param backend: Requested backend name
+    :param supported: Backends the solution implements
+    :return: The backend name
+    """
+    if backend not in supported:
+        raise ValueError(f"Unsupported backend {backend!r}, expected one of {', '.join(supported)}")
+    if backend == NUMPY and importlib.util.find_spec("numpy") is None:
+        raise RuntimeError("The numpy backend needs numpy installed")
+
+    return backend
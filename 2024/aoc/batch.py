@@ -0,0 +1,177 @@
+"""
+Solve one day against many puzzle inputs in a single pool of worker processes.
+
+Every (input, part) pair is a separate job, so a slow part of one input doesn't hold up the rest, and the
+results are printed as the jobs finish. Each job parses its own input; with ``--cache`` the second part of
+an input usually finds the first part's parse in the parse cache. Days with a solve stage shared by both
+parts solve both parts of an input in one job instead, so the shared stage runs once per input. A summary
+of every input's answers and timings is printed at the end and can also be written as JSON.
+
+    python -m aoc.batch 6 inputs/day-06/
+    python -m aoc.batch 2 'inputs/*/day-02.txt' --jobs 8 -o summary.json
+"""
+
+import argparse
+import glob
+import json
+import sys
+import traceback
+from concurrent.futures import as_completed
+from pathlib import Path
+
+from aoc.backends import BACKENDS, PYTHON
+from aoc.cache import DEFAULT_DIR, DEFAULT_LIMIT, ParseCache
+from aoc.parallel import cpu_count, process_pool
+from aoc.runner import accepted_options, format_duration, load_day, parse_input, solve_input, timed
+
+PARTS = (1, 2)
+
+# Day, options and cache handed to each worker process once, when the pool starts
+worker_state = None
+
+
+def find_inputs(patterns: list[str]) -> list[Path]:
+    """
+    Expand directories and glob patterns into input files.
+
+    :param patterns: Directories, whose files are all inputs, or glob patterns
+    :return: Sorted list of unique input files
+    """
+    paths = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            paths.update(child for child in path.iterdir() if child.is_file() and not child.name.startswith("."))
+        else:
+            paths.update(Path(match) for match in glob.glob(pattern, recursive=True) if Path(match).is_file())
+
+    return sorted(paths)
+
+
+def init_worker(day: int, options: dict, cache: ParseCache | None):
+    global worker_state
+    # Import the day before the first job so its import time isn't charged to it
+    load_day(day)
+    worker_state = day, options, cache
+
+
+def solve(path: Path, parts: tuple[int, ...]) -> list[dict]:
+    """
+    Parse an input and solve some of its parts, in a worker process.
+
+    The stages the parts share, parsing and any solve stage, are timed once and reported with the first part.
+    :param path: Puzzle input file
+    :param parts: Parts to solve
+    :return: Job record for each part, with the answer and timings, or the error if the solver failed
+    """
+    day, options, cache = worker_state
+    module = load_day(day)
+    records = [{"input": str(path), "part": part} for part in parts]
+    shared = records[0]
+    try:
+        parsed, shared["parse_time"] = timed(parse_input, module, day, path, options, cache)
+        parsed, solve_time = timed(solve_input, module, parsed, options)
+        if hasattr(module, "solve"):
+            shared["solve_time"] = solve_time
+        for record in records:
+            solver = module.part1 if record["part"] == 1 else module.part2
+            record["answer"], record["time"] = timed(solver, parsed, **accepted_options(solver, options))
+    except Exception as ex:
+        error = "".join(traceback.format_exception_only(ex)).strip()
+        for record in records:
+            if "answer" not in record:
+                record["error"] = error
+
+    return records
+
+
+def format_timings(record: dict) -> str:
+    """
+    Describe the stages a job record timed.
+
+    :param record: Job record of a part
+    :return: Each timed stage and its duration
+    """
+    stages = [
+        f"{label} {format_duration(record[key])}"
+        for label, key in (("parse", "parse_time"), ("solve", "solve_time"), (f"part {record['part']}", "time"))
+        if key in record
+    ]
+    return ", ".join(stages)
+
+
+def batch(day: int, paths: list[Path], jobs: int, options: dict, cache: ParseCache | None = None) -> list[dict]:
+    """
+    Solve both parts of every input on a shared process pool, printing results as they finish.
+
+    :param day: Day of the month
+    :param paths: Puzzle input files
+    :param jobs: Worker processes
+    :param options: Keyword options passed to the stages that accept them
+    :param cache: Cache of parsed inputs, if parsing should go through one
+    :return: Summary record for each input, in input order
+    """
+    summaries = {path: {"input": str(path)} for path in paths}
+    # A solve stage is shared by both parts, so it is only worth running once per input
+    job_parts = [PARTS] if hasattr(load_day(day), "solve") else [(part,) for part in PARTS]
+
+    with process_pool(jobs, init_worker, (day, options, cache)) as pool:
+        # Submit input by input, so both parts of an input run close together and can share a cached parse
+        futures = [pool.submit(solve, path, parts) for path in paths for parts in job_parts]
+        for future in as_completed(futures):
+            for record in future.result():
+                timings = format_timings(record)
+                path, part = Path(record.pop("input")), record.pop("part")
+                summaries[path][f"part{part}"] = record
+
+                if "error" in record:
+                    print(f"{path} part {part}: FAILED {record['error']}", flush=True)
+                else:
+                    print(f"{path} part {part}: {record['answer']}  ({timings})", flush=True)
+
+    return list(summaries.values())
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="aoc.batch", description="Solve a day against many puzzle inputs at once.")
+    parser.add_argument("day", type=int, help="Day to solve")
+    parser.add_argument("inputs", nargs="+", help="Directories of inputs or glob patterns matching them")
+    parser.add_argument("-j", "--jobs", type=int, default=cpu_count(), help="Worker processes (default: every core)")
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default=PYTHON, help="Implementation for days that offer several")
+    parser.add_argument(
+        "--cache", type=Path, nargs="?", const=DEFAULT_DIR, metavar="DIR",
+        help=f"Reuse parsed inputs from a cache directory (default: {DEFAULT_DIR})",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Write the per-input summary as JSON")
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    paths = find_inputs(args.inputs)
+    if not paths:
+        parser.error(f"No inputs found in {' '.join(args.inputs)}")
+
+    # The jobs already fill the pool, so each part runs on a single process
+    options = {"workers": 1, "backend": args.backend}
+    cache = ParseCache(args.cache, DEFAULT_LIMIT) if args.cache is not None else None
+    summaries = batch(args.day, paths, args.jobs, options, cache)
+
+    print()
+    print(f"{'input':<40} {'part 1':>16} {'part 2':>16} {'total':>10}")
+    failures = 0
+    for summary in summaries:
+        parts = [summary[f"part{part}"] for part in PARTS]
+        failures += sum("error" in record for record in parts)
+        answers = [str(record.get("answer", "FAILED")) for record in parts]
+        total = sum(record.get("parse_time", 0) + record.get("solve_time", 0) + record.get("time", 0) for record in parts)
+        print(f"{summary['input']:<40} {answers[0]:>16} {answers[1]:>16} {format_duration(total):>10}")
+    print(f"{len(summaries)} inputs, {failures} failed job{'s' if failures != 1 else ''}")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps({"day": args.day, "inputs": summaries}, indent=2, default=str) + "\n")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
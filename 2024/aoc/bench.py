@@ -0,0 +1,215 @@
+"""
+Benchmark the 2024 solutions against scaled synthetic inputs.
+
+Every (day, scale, workers) run uses a fresh interpreter so its peak RSS is measured on its own. Once a day
+times out at one scale, its larger scales are skipped since they can only be slower. Given several worker
+counts, each run also reports its speedup over the first worker count at the same scale.
+
+Runs can be repeated, in which case the median of each timing is reported. Every run is also appended to
+the benchmark history, see ``aoc.history``.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from aoc.backends import BACKENDS, PYTHON
+from aoc.generate import GENERATORS, generate
+from aoc.history import DEFAULT_DB, History, current_commit
+from aoc.runner import YEAR_DIR, format_duration, parse_days
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+DEFAULT_TIMEOUT = 300
+
+
+def input_path(directory: Path, day: int, scale: int) -> Path:
+    """
+    Get a generated input, creating it on first use.
+
+    :param directory: Directory holding the generated inputs
+    :param day: Day of the month
+    :param scale: Input size multiplier
+    :return: Path to the generated input
+    """
+    path = directory / f"day-{day:02d}-x{scale}.txt"
+    if not path.exists():
+        path.write_text(generate(day, scale))
+
+    return path
+
+
+def run_once(day: int, path: Path, timeout: float, workers: int = 1, backend: str = PYTHON) -> dict | None:
+    """
+    Run a day in a fresh interpreter and collect its timings and peak RSS.
+
+    :param day: Day of the month
+    :param path: Input file to solve
+    :param timeout: Seconds to wait before giving up
+    :param workers: Worker processes for days that run in parallel
+    :param backend: Implementation for days that offer several
+    :return: Result record, a record with a failed status and the run's stderr if it failed, or None if the run
+        timed out
+    """
+    command = [
+        sys.executable, "-m", "aoc", str(day), "--input", str(path),
+        "--workers", str(workers), "--backend", backend, "--json",
+    ]
+    try:
+        completed = subprocess.run(command, cwd=YEAR_DIR, capture_output=True, text=True, timeout=timeout, check=True)
+    except subprocess.TimeoutExpired:
+        return None
+    except subprocess.CalledProcessError as ex:
+        return {"status": "failed", "stderr": ex.stderr}
+
+    output = json.loads(completed.stdout)
+    record = output["results"][0]
+    record["peak_rss"] = output["peak_rss"]
+    return record
+
+
+def median_record(runs: list[dict]) -> dict:
+    """
+    Summarise repeated runs of the same benchmark.
+
+    :param runs: Result records of each run
+    :return: Record with the median of each timing and the largest peak RSS
+    """
+    record = dict(runs[0])
+    for timing in ("parse_time", "solve_time", "part1_time", "part2_time"):
+        # Only days with a solve stage time it
+        if record.get(timing) is not None:
+            record[timing] = statistics.median(run[timing] for run in runs)
+    record["peak_rss"] = max(run["peak_rss"] for run in runs)
+    record["runs"] = len(runs)
+    return record
+
+
+def bench(
+    days: list[int], scales: list[int], directory: Path, timeout: float, worker_counts: list[int], backend: str = PYTHON,
+    repeat: int = 1, history: History | None = None,
+) -> list[dict]:
+    """
+    Benchmark each day at each scale and worker count, printing results as they arrive.
+
+    :param days: Days to benchmark
+    :param scales: Input size multipliers to benchmark
+    :param directory: Directory holding the generated inputs
+    :param timeout: Seconds to allow each run
+    :param worker_counts: Worker process counts to benchmark
+    :param backend: Implementation for days that offer several
+    :param repeat: Number of times to run each benchmark
+    :param history: Benchmark history to append every run to
+    :return: List of result records, with median timings over the repeats
+    """
+    commit = current_commit() if history is not None else None
+    records = []
+    print(
+        f"{'day':>3} {'scale':>6} {'workers':>7} {'input':>10} {'parse':>10} {'solve':>10} {'part 1':>10} {'part 2':>10}"
+        f" {'peak rss':>10} {'speedup':>8}"
+    )
+
+    for day in days:
+        for scale in sorted(scales):
+            path = input_path(directory, day, scale)
+            size = path.stat().st_size
+            baseline = None
+            timed_out = False
+
+            for workers in worker_counts:
+                runs = []
+                run = None
+                for _ in range(repeat):
+                    run = run_once(day, path, timeout, workers, backend)
+                    if run is None or run.get("status") == "failed":
+                        break
+                    run.update({"scale": scale, "workers": workers, "backend": backend, "input_bytes": size})
+                    runs.append(run)
+                    if history is not None:
+                        history.record(commit, run)
+
+                if run is not None and run.get("status") == "failed":
+                    records.append({
+                        "day": day, "scale": scale, "workers": workers, "backend": backend,
+                        "input_bytes": size, "status": "failed", "stderr": run["stderr"],
+                    })
+                    error = run["stderr"].strip().splitlines()
+                    print(f"{day:>3} {scale:>6} {workers:>7} {size:>10} failed: {error[-1] if error else 'no output'}")
+                    continue
+
+                if len(runs) < repeat:
+                    records.append({
+                        "day": day, "scale": scale, "workers": workers, "backend": backend,
+                        "input_bytes": size, "status": "timeout",
+                    })
+                    print(f"{day:>3} {scale:>6} {workers:>7} {size:>10} timed out after {format_duration(timeout)}")
+                    timed_out = True
+                    continue
+
+                record = median_record(runs)
+                solve_time = record.get("solve_time")
+                total = record["parse_time"] + (solve_time or 0.0) + record["part1_time"] + record["part2_time"]
+                baseline = baseline or total
+                record["status"] = "ok"
+                record["speedup"] = baseline / total
+                records.append(record)
+                print(
+                    f"{day:>3} {scale:>6} {workers:>7} {size:>10}"
+                    f" {format_duration(record['parse_time']):>10}"
+                    f" {format_duration(solve_time) if solve_time is not None else '-':>10}"
+                    f" {format_duration(record['part1_time']):>10}"
+                    f" {format_duration(record['part2_time']):>10}"
+                    f" {record['peak_rss'] / 2 ** 20:>6.1f} MiB"
+                    f" {record['speedup']:>7.2f}x"
+                )
+
+            if timed_out:
+                print(f"{day:>3} skipping scales above {scale}")
+                break
+
+    return records
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="aoc.bench", description="Benchmark solutions on scaled synthetic inputs.")
+    parser.add_argument("days", nargs="*", help="Days to benchmark, e.g. 6 or 1-5 (default: every generated day)")
+    parser.add_argument("-s", "--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Input size multipliers")
+    parser.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT, help="Seconds to allow each run")
+    parser.add_argument(
+        "-w", "--workers", type=int, nargs="+", default=[1], help="Worker process counts, e.g. 1 2 4 8 for a scaling report"
+    )
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default=PYTHON, help="Implementation for days that offer several")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="Runs of each benchmark, the median is reported")
+    parser.add_argument("--history", type=Path, default=DEFAULT_DB, help=f"Benchmark history database (default: {DEFAULT_DB})")
+    parser.add_argument("--no-history", action="store_true", help="Don't record the runs in the benchmark history")
+    parser.add_argument("-d", "--inputs", type=Path, help="Directory to keep generated inputs in (default: temporary)")
+    parser.add_argument("-o", "--output", type=Path, help="Write result records to a JSON file")
+    args = parser.parse_args(argv)
+
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    days = parse_days(args.days) if args.days else sorted(GENERATORS)
+    history = None if args.no_history else History(args.history)
+    try:
+        with tempfile.TemporaryDirectory(prefix="aoc-bench-") as scratch:
+            directory = args.inputs or Path(scratch)
+            directory.mkdir(parents=True, exist_ok=True)
+            records = bench(
+                days, args.scales, directory, args.timeout, args.workers, args.backend, args.repeat, history
+            )
+    finally:
+        if history is not None:
+            history.close()
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(records, indent=2, default=str) + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Content-addressed cache of parsed puzzle inputs.
+
+A day opts in by defining ``PARSER_VERSION`` along with two hooks:
+
+* ``encode(parsed)`` flattens the parsed value into a dict of named buffers, such as ``array`` objects,
+  bytes or numpy arrays, or returns None if the value can't be cached
+* ``decode(fields)`` rebuilds the parsed value from those buffers
+
+Entries are keyed by a hash of the input bytes, the day, its parser version and the parse options, so an
+edited input or a bumped parser version is simply a miss. Each entry is a single binary file whose buffers
+are read back as memoryviews over a memory map, without parsing or copying. The cache directory is kept
+under a size limit by evicting the least recently used entries, tracked through their modification times.
+"""
+
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array, typecodes
+from pathlib import Path
+
+DEFAULT_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "aoc-2024"
+DEFAULT_LIMIT = 1 << 30
+
+MAGIC = b"AOCPARSE"
+# Magic, then the length of the JSON header that follows it
+PREFIX = struct.Struct(f"<{len(MAGIC)}sI")
+# Buffers start on a multiple of this so they can be viewed as any item size
+ALIGNMENT = 8
+
+
+def align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def join_rows(rows: list) -> tuple[array, array]:
+    """
+    Flatten rows of integers for caching.
+
+    :param rows: Rows of integers, of any lengths
+    :return: Tuple of every value in order and the length of each row
+    """
+    return array("q", itertools.chain.from_iterable(rows)), array("q", map(len, rows))
+
+
+def split_rows(values, lengths) -> list[list[int]]:
+    """
+    Rebuild rows of integers flattened by ``join_rows()``.
+
+    :param values: Every value in order
+    :param lengths: Length of each row
+    :return: List of rows
+    """
+    values = values.tolist()
+    rows = []
+    start = 0
+    for length in lengths.tolist():
+        rows.append(values[start:start + length])
+        start += length
+
+    return rows
+
+
+def write_entry(path: Path, fields: dict):
+    """
+    Write named buffers into a cache entry file.
+
+    The file is written beside the entry and renamed into place, so readers never see a partial entry.
+    :param path: Entry file to create
+    :param fields: Buffers by name, anything supporting the buffer protocol
+    """
+    views = {name: memoryview(value) for name, value in fields.items()}
+    layout = []
+    offset = 0
+    for name, view in views.items():
+        if not view.contiguous:
+            raise ValueError(f"Cache field {name} is not a contiguous buffer")
+        layout.append([name, view.format, list(view.shape), offset])
+        offset = align(offset + view.nbytes)
+
+    header = json.dumps(layout).encode()
+    start = align(PREFIX.size + len(header))
+
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(PREFIX.pack(MAGIC, len(header)) + header)
+            for (_, _, _, field_offset), view in zip(layout, views.values()):
+                file.seek(start + field_offset)
+                file.write(view)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def read_entry(path: Path) -> dict[str, memoryview]:
+    """
+    Map a cache entry file and view its buffers.
+
+    :param path: Entry file to read
+    :return: Read-only buffers by name, with their original item format and shape
+    """
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, header_size = PREFIX.unpack_from(mapped)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a parse cache entry")
+    layout = json.loads(mapped[PREFIX.size:PREFIX.size + header_size])
+    start = align(PREFIX.size + header_size)
+
+    fields = {}
+    view = memoryview(mapped)
+    for name, format, shape, offset in layout:
+        size = struct.calcsize(format)
+        for extent in shape:
+            size *= extent
+        if size == 0:
+            # Memoryviews can't be cast to an empty shape, so empty fields are empty arrays of the same type
+            fields[name] = memoryview(array(format) if format in typecodes else b"")
+            continue
+        fields[name] = view[start + offset:start + offset + size].cast(format, shape)
+
+    return fields
+
+
+class ParseCache:
+    """
+    Directory of parsed inputs, limited in total size.
+    """
+
+    __slots__ = ("directory", "limit")
+
+    def __init__(self, directory: Path = DEFAULT_DIR, limit: int = DEFAULT_LIMIT):
+        self.directory = Path(directory)
+        self.limit = limit
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(day: int, data: bytes, version, options: dict) -> str:
+        """
+        Name the cache entry for a parse.
+
+        :param day: Day of the month
+        :param data: Raw puzzle input
+        :param version: The day's parser version
+        :param options: Options passed to the parser
+        :return: Hex digest identifying the entry
+        """
+        digest = hashlib.sha256(data)
+        digest.update(json.dumps([day, version, options], sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.bin"
+
+    def get(self, key: str) -> dict[str, memoryview] | None:
+        """
+        Look up a cache entry, marking it as recently used.
+
+        :param key: Entry key
+        :return: Buffers by name, or None on a miss
+        """
+        path = self.path(key)
+        try:
+            fields = read_entry(path)
+            os.utime(path)
+        except Exception:
+            # An entry that can't be read back, whatever the reason, is as good as missing
+            return None
+
+        return fields
+
+    def put(self, key: str, fields: dict):
+        """
+        Store a cache entry, then evict old entries until the cache fits its size limit.
+
+        :param key: Entry key
+        :param fields: Buffers by name
+        """
+        path = self.path(key)
+        write_entry(path, fields)
+        self.evict(keep=path)
+
+    def evict(self, keep: Path | None = None):
+        """
+        Delete the least recently used entries until the cache fits its size limit.
+
+        :param keep: Entry to keep regardless, usually the one just written
+        """
+        entries = []
+        for path in self.directory.glob("*.bin"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.limit:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,150 @@
+"""
+ctypes bindings to the C solvers, for the ``c`` backend.
+
+Days 01 to 03 have C solutions that CMake also builds as shared libraries of just the solver functions:
+
+    cmake -S . -B build && cmake --build build
+
+Each library is found at ``build/day-XX/libsolution.so`` under the 2024 directory, or under the directory
+named by ``AOC_C_LIBRARY_DIR`` laid out the same way. Python ``array`` and numpy buffers are handed to C
+without copying whenever they are writable.
+
+Running this module solves each day with both the Python and the C backend and checks the answers agree.
+"""
+
+import argparse
+import ctypes
+import functools
+import os
+import sys
+from array import array
+from pathlib import Path
+
+from aoc.backends import C, PYTHON
+from aoc.runner import format_duration, parse_days, run_day
+
+LIBRARY_DIR_VARIABLE = "AOC_C_LIBRARY_DIR"
+LIBRARY_DIR = Path(__file__).resolve().parent.parent / "build"
+
+LONG_P = ctypes.POINTER(ctypes.c_long)
+
+# Return and argument types of the functions each day's library exports
+SIGNATURES = {
+    1: {
+        "sort_list": (None, [LONG_P, ctypes.c_size_t]),
+        "number_freq": (ctypes.c_long, [ctypes.c_long, LONG_P, ctypes.c_size_t]),
+        "total_distance": (ctypes.c_long, [LONG_P, LONG_P, ctypes.c_size_t]),
+        "similarity": (ctypes.c_long, [LONG_P, LONG_P, ctypes.c_size_t]),
+    },
+    2: {
+        "safe": (ctypes.c_bool, [LONG_P, ctypes.c_size_t]),
+        "dampened_safe": (ctypes.c_bool, [LONG_P, ctypes.c_size_t]),
+        "count_safe": (ctypes.c_long, [LONG_P, LONG_P, ctypes.c_size_t, ctypes.c_bool]),
+    },
+    3: {
+        "parse_instructions": (ctypes.c_long, [ctypes.c_char_p]),
+        "recover_instructions": (None, [ctypes.c_char_p, ctypes.c_size_t]),
+    },
+}
+
+
+def library_path(day: int) -> Path:
+    """
+    Get where a day's shared library is built.
+
+    :param day: Day of the month
+    :return: Path to the shared library
+    """
+    directory = Path(os.environ.get(LIBRARY_DIR_VARIABLE) or LIBRARY_DIR)
+    if sys.platform == "win32":
+        name = "solution.dll"
+    else:
+        name = "libsolution.dylib" if sys.platform == "darwin" else "libsolution.so"
+
+    return directory / f"day-{day:02d}" / name
+
+
+@functools.cache
+def library(day: int) -> ctypes.CDLL:
+    """
+    Load a day's shared library, with the types of its functions declared.
+
+    :param day: Day of the month
+    :return: The loaded library
+    """
+    if day not in SIGNATURES:
+        raise ValueError(f"Day {day} has no C solver")
+
+    path = library_path(day)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No C library for day {day} at {path}, build it with cmake -S . -B build && cmake --build build"
+        )
+
+    lib = ctypes.CDLL(str(path))
+    for name, (restype, argtypes) in SIGNATURES[day].items():
+        function = getattr(lib, name)
+        function.restype = restype
+        function.argtypes = argtypes
+
+    return lib
+
+
+def long_array(values) -> array:
+    """
+    Build an array of C longs, the element type the C solvers use.
+
+    :param values: Iterable of integers, or a buffer of C longs
+    :return: Array of C longs
+    """
+    if isinstance(values, array) and values.itemsize == ctypes.sizeof(ctypes.c_long):
+        # Same sized integers, such as array("q") where longs are 64 bits, copy across as bytes
+        values = memoryview(values)
+    if isinstance(values, memoryview):
+        longs = array("l")
+        longs.frombytes(values.cast("B"))
+        return longs
+
+    return array("l", values)
+
+
+def longs(buffer) -> ctypes.Array:
+    """
+    View a buffer of C longs as a ctypes array, to pass as a pointer argument.
+
+    :param buffer: ``array("l")``, int64 numpy array or other buffer of C longs
+    :return: ctypes array sharing the buffer's memory, or a copy if the buffer is read-only
+    """
+    view = memoryview(buffer)
+    if view.itemsize != ctypes.sizeof(ctypes.c_long):
+        raise TypeError(f"Expected a buffer of {ctypes.sizeof(ctypes.c_long)} byte integers, not {view.format!r}")
+
+    array_type = ctypes.c_long * len(view)
+    return array_type.from_buffer_copy(view) if view.readonly else array_type.from_buffer(view)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="aoc.cbackend", description="Check the C backend against the Python backend.")
+    parser.add_argument("days", nargs="*", help="Days to check, e.g. 2 or 1-3 (default: every day with a C solver)")
+    parser.add_argument("-i", "--input", type=Path, help="Input file to use instead of the day's input")
+    args = parser.parse_args(argv)
+
+    days = parse_days(args.days) if args.days else sorted(SIGNATURES)
+    if args.input is not None and len(days) != 1:
+        parser.error("--input requires exactly one day")
+
+    mismatches = 0
+    for day in days:
+        expected = run_day(day, args.input, {"backend": PYTHON})
+        actual = run_day(day, args.input, {"backend": C})
+        for part, python_answer, c_answer in ((1, expected.part1, actual.part1), (2, expected.part2, actual.part2)):
+            agree = python_answer == c_answer
+            mismatches += not agree
+            print(f"Day {day:02d} part {part}: python {python_answer}  c {c_answer}  {'ok' if agree else 'MISMATCH'}")
+        print(f"        total time: python {format_duration(expected.total_time)}  c {format_duration(actual.total_time)}")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
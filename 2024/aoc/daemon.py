@@ -0,0 +1,320 @@
+"""
+Long-lived solver server that keeps the day modules imported between runs.
+
+Every ``python -m aoc`` run pays for starting the interpreter, importing the runner and the day module, and
+compiling the day's module level state before it parses anything. For short runs that is most of the time.
+``serve`` imports the days once and answers requests on a Unix domain socket, and the client commands send
+a day, parts and input path over the socket and print the answers with the server side timings.
+
+The protocol is one JSON object per line each way, one request per connection. A day module whose file has
+changed since it was imported is imported again before it is next run.
+
+While importing the days, the server times every module imported on the way, in the same layout as
+``python -X importtime``, and ``status`` prints that report along with how long the server took to start.
+
+    python -m aoc.daemon serve &
+    python -m aoc.daemon run 3
+    python -m aoc.daemon run 6 -p 2 -i sample -w 8
+    python -m aoc.daemon status
+    python -m aoc.daemon stop
+
+The client imports neither the runner nor any day module, so it starts quicker than the runner itself.
+"""
+
+import argparse
+import builtins
+import importlib
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+from aoc.backends import BACKENDS, PYTHON
+
+DEFAULT_SOCKET = Path(os.environ.get("XDG_RUNTIME_DIR") or "/tmp") / f"aoc-2024-{os.getuid()}.sock"
+PARTS = (1, 2)
+
+
+class ImportTimer:
+    """
+    Record how long each module takes to import, like ``python -X importtime``.
+
+    While active, ``__import__`` is wrapped so every module imported for the first time is timed, both on
+    its own and including the modules it imports in turn. Modules imported without an import statement,
+    through ``importlib``, only count towards whichever module imported them.
+    """
+
+    __slots__ = ("entries", "stack", "original")
+
+    def __init__(self):
+        # (name, self time, cumulative time, depth) in the order imports finish
+        self.entries = []
+        # Time spent in nested imports so far, for each import in progress
+        self.stack = []
+        self.original = None
+
+    def __enter__(self) -> "ImportTimer":
+        self.original = builtins.__import__
+        builtins.__import__ = self.timed_import
+        return self
+
+    def __exit__(self, *exc_info):
+        builtins.__import__ = self.original
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Relative and already imported modules cost nothing worth reporting
+        if level or name in sys.modules:
+            return self.original(name, globals, locals, fromlist, level)
+
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self.original(name, globals, locals, fromlist, level)
+        finally:
+            self.time(name, time.perf_counter() - start)
+
+    def time(self, name: str, cumulative: float):
+        """
+        Record a finished import.
+
+        :param name: Module name
+        :param cumulative: Seconds spent importing the module, including the modules it imported
+        """
+        nested = self.stack.pop()
+        # Imports that failed, such as optional dependencies that aren't installed, aren't modules
+        if name in sys.modules:
+            self.entries.append((name, cumulative - nested, cumulative, len(self.stack)))
+        if self.stack:
+            self.stack[-1] += cumulative
+
+    def measure(self, name: str, func):
+        """
+        Time an import done by a function rather than an import statement.
+
+        :param name: Name to report the import under
+        :param func: Function doing the import
+        :return: The function's return value
+        """
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            self.time(name, time.perf_counter() - start)
+
+    def report(self) -> list[str]:
+        """
+        Format the recorded imports like ``python -X importtime``, in microseconds.
+
+        :return: Report lines, starting with the header
+        """
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for name, self_time, cumulative, depth in self.entries:
+            lines.append(f"import time: {self_time * 1e6:>9.0f} | {cumulative * 1e6:>10.0f} | {'  ' * depth}{name}")
+        return lines
+
+
+def request(message: dict, socket_path: Path = DEFAULT_SOCKET) -> dict:
+    """
+    Send a request to the server and wait for its reply.
+
+    :param message: Request object
+    :param socket_path: Server socket
+    :return: Reply object
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(socket_path))
+        connection.sendall(json.dumps(message).encode() + b"\n")
+        with connection.makefile("rb") as reply:
+            line = reply.readline()
+
+    if not line:
+        raise ConnectionError(f"The server at {socket_path} closed the connection without replying")
+    return json.loads(line)
+
+
+def serve(socket_path: Path, days: list[int] | None = None, cache_dir: Path | None = None, cache_limit: int = 0):
+    """
+    Import the days and answer requests until asked to stop.
+
+    :param socket_path: Unix socket to listen on
+    :param days: Days to import up front, defaults to every day
+    :param cache_dir: Parse cache directory, if parsing should go through one
+    :param cache_limit: Size limit of the parse cache in bytes
+    """
+    started = time.perf_counter()
+    timer = ImportTimer()
+    # Import the runner here rather than at the top, so clients don't pay for it
+    with timer:
+        runner = timer.measure("aoc.runner", lambda: importlib.import_module("aoc.runner"))
+        from aoc.cache import ParseCache
+
+        days = days or runner.available_days()
+        for day in days:
+            timer.measure(f"day{day:02d}", lambda: runner.load_day(day))
+
+    cache = ParseCache(cache_dir, cache_limit) if cache_dir is not None else None
+    # Modification time of each day's source when it was imported, to notice edits
+    loaded = {day: runner.day_dir(day).joinpath("solution.py").stat().st_mtime_ns for day in days}
+
+    def load(day: int):
+        source = runner.day_dir(day) / "solution.py"
+        mtime = source.stat().st_mtime_ns if source.exists() else None
+        if day in loaded and loaded[day] != mtime:
+            sys.modules.pop(f"day{day:02d}", None)
+        module = runner.load_day(day)
+        loaded[day] = mtime
+        return module
+
+    def solve(message: dict) -> dict:
+        day = message["day"]
+        module = load(day)
+        options = message.get("options", {})
+        input_path = Path(message.get("input") or runner.day_dir(day) / "input")
+
+        reply = {"day": day}
+        parsed, reply["parse_time"] = runner.timed(runner.parse_input, module, day, input_path, options, cache)
+        parsed, solve_time = runner.timed(runner.solve_input, module, parsed, options)
+        if hasattr(module, "solve"):
+            reply["solve_time"] = solve_time
+        for part in message.get("parts", PARTS):
+            solver = module.part1 if part == 1 else module.part2
+            reply[f"part{part}"], reply[f"part{part}_time"] = runner.timed(
+                solver, parsed, **runner.accepted_options(solver, options)
+            )
+        return reply
+
+    if socket_path.exists():
+        try:
+            request({"command": "status"}, socket_path)
+        except (OSError, ValueError):
+            # Left behind by a server that didn't shut down cleanly
+            socket_path.unlink()
+        else:
+            raise RuntimeError(f"A server is already listening on {socket_path}")
+
+    ready = time.perf_counter() - started
+    print(f"Serving days {', '.join(map(str, days))} on {socket_path}, ready in {runner.format_duration(ready)}", flush=True)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(socket_path))
+        server.listen()
+        try:
+            while True:
+                connection, _ = server.accept()
+                with connection, connection.makefile("rwb") as stream:
+                    try:
+                        message = json.loads(stream.readline())
+                        command = message.get("command", "run")
+                        if command == "run":
+                            reply = solve(message)
+                        elif command == "status":
+                            reply = {
+                                "pid": os.getpid(), "days": sorted(loaded), "ready_time": ready,
+                                "uptime": time.perf_counter() - started, "imports": timer.report(),
+                            }
+                        elif command == "stop":
+                            reply = {"stopped": True}
+                        else:
+                            reply = {"error": f"Unknown command {command!r}"}
+                    except Exception as ex:
+                        command = None
+                        reply = {"error": f"{type(ex).__name__}: {ex}"}
+
+                    stream.write(json.dumps(reply, default=str).encode() + b"\n")
+                    stream.flush()
+                if command == "stop":
+                    return
+        finally:
+            socket_path.unlink(missing_ok=True)
+
+
+def format_duration(seconds: float) -> str:
+    # Same as aoc.runner.format_duration, repeated so the client doesn't import the runner
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="aoc.daemon", description="Keep the solutions imported in a local server.")
+    parser.add_argument("--socket", type=Path, default=DEFAULT_SOCKET, help=f"Server socket (default: {DEFAULT_SOCKET})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Start the server in the foreground")
+    serve_parser.add_argument("days", type=int, nargs="*", help="Days to import up front (default: every day)")
+    serve_parser.add_argument(
+        "--cache", type=Path, nargs="?", const=True, metavar="DIR",
+        help="Reuse parsed inputs from a cache directory (default: the runner's cache directory)",
+    )
+    serve_parser.add_argument("--cache-limit", type=int, metavar="MIB", help="Size limit of the parse cache (default: 1024)")
+
+    run_parser = commands.add_parser("run", help="Solve a day on the server")
+    run_parser.add_argument("day", type=int, help="Day to solve")
+    run_parser.add_argument("-i", "--input", type=Path, help="Input file to use instead of the day's input")
+    run_parser.add_argument("-p", "--part", type=int, choices=PARTS, action="append", help="Parts to solve (default: both)")
+    run_parser.add_argument("-w", "--workers", type=int, default=1, help="Worker processes for days that run in parallel")
+    run_parser.add_argument("-b", "--backend", choices=BACKENDS, default=PYTHON, help="Implementation for days that offer several")
+    run_parser.add_argument("--json", action="store_true", help="Print the server's reply as JSON")
+
+    commands.add_parser("status", help="Show the server's days, startup time and import times")
+    commands.add_parser("stop", help="Stop the server")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from aoc.cache import DEFAULT_DIR, DEFAULT_LIMIT
+        cache_dir = DEFAULT_DIR if args.cache is True else args.cache
+        cache_limit = args.cache_limit << 20 if args.cache_limit is not None else DEFAULT_LIMIT
+        try:
+            serve(args.socket, args.days, cache_dir, cache_limit)
+        except RuntimeError as ex:
+            parser.error(str(ex))
+        return 0
+
+    message = {"command": args.command}
+    if args.command == "run":
+        message.update(
+            day=args.day, parts=args.part or list(PARTS),
+            input=str(args.input.resolve()) if args.input is not None else None,
+            options={"workers": args.workers, "backend": args.backend},
+        )
+
+    start = time.perf_counter()
+    try:
+        reply = request(message, args.socket)
+    except (ConnectionError, FileNotFoundError) as ex:
+        print(f"No server on {args.socket}: {ex}", file=sys.stderr)
+        return 1
+    round_trip = time.perf_counter() - start
+
+    if "error" in reply:
+        print(reply["error"], file=sys.stderr)
+        return 1
+
+    if args.command == "status":
+        print(f"Server {reply['pid']} serving days {', '.join(map(str, reply['days']))}")
+        print(f"Ready in {format_duration(reply['ready_time'])}, up for {format_duration(reply['uptime'])}")
+        print("\n".join(reply["imports"]))
+    elif args.command == "run" and args.json:
+        reply["round_trip"] = round_trip
+        json.dump(reply, sys.stdout)
+        print()
+    elif args.command == "run":
+        parts = [part for part in PARTS if f"part{part}" in reply]
+        print(f"Day {reply['day']:02d}  " + "  ".join(f"Part {part}: {reply[f'part{part}']}" for part in parts))
+        print(
+            f"        parse {format_duration(reply['parse_time'])}"
+            + (f"  solve {format_duration(reply['solve_time'])}" if "solve_time" in reply else "")
+            + "".join(f"  part {part} {format_duration(reply[f'part{part}_time'])}" for part in parts)
+            + f"  round trip {format_duration(round_trip)}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Synthetic puzzle input generators for scaling the 2024 solutions.
+
+Each generator produces an input with the same shape as the real puzzle input, ``scale`` times its size.
+Grids grow in both dimensions so the cell count scales, list based inputs grow in line count, and the
+inputs with nested structure (day 05 updates, day 07 operand lists) also grow their inner lengths.
+"""
+
+import argparse
+import math
+import random
+import string
+import sys
+from pathlib import Path
+
+DEFAULT_SEED = 2024
+
+FREQUENCIES = string.digits + string.ascii_lowercase + string.ascii_uppercase
+GUARD_DIRECTIONS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
+
+
+def scaled_side(side: int, scale: int) -> int:
+    """
+    Grow a grid dimension so the grid's cell count grows by the scale factor.
+
+    :param side: Side length of the real puzzle grid
+    :param scale: Input size multiplier
+    :return: Scaled side length
+    """
+    return max(1, round(side * math.sqrt(scale)))
+
+
+def day01(scale: int, rng: random.Random) -> str:
+    lines = 1000 * scale
+    left = [rng.randint(10000, 99999) for _ in range(lines)]
+    # Draw part of the right list from the left list so the similarity score has matches to count
+    right = [rng.choice(left) if rng.random() < 0.3 else rng.randint(10000, 99999) for _ in range(lines)]
+
+    return "".join(f"{l}   {r}\n" for l, r in zip(left, right))
+
+
+def day02(scale: int, rng: random.Random) -> str:
+    reports = []
+    for _ in range(1000 * scale):
+        levels = [rng.randint(10, 90)]
+        direction = rng.choice([-1, 1])
+        for _ in range(rng.randint(4, 7)):
+            levels.append(levels[-1] + direction * rng.randint(1, 3))
+
+        # Most reports pick up a fault, some of which the dampener can tolerate
+        if rng.random() < 0.6:
+            levels[rng.randrange(len(levels))] += rng.choice([-4, -1, 0, 1, 4])
+        if rng.random() < 0.2:
+            levels[rng.randrange(len(levels))] += rng.choice([-5, 5])
+
+        reports.append(" ".join(map(str, levels)))
+
+    return "\n".join(reports) + "\n"
+
+
+def day03(scale: int, rng: random.Random) -> str:
+    noise = "!@#$%^&*()[]{}<>?/;:'+-~, "
+    decoys = ["why()", "who()", "where()", "select()", "from()", "how()", "what()", "when()", "mul(", "mul[", "do_not_"]
+    length = 19200 * scale
+    line_length = 3200
+    chunks = []
+    size = 0
+
+    while size < length:
+        roll = rng.random()
+        if roll < 0.35:
+            chunk = f"mul({rng.randint(1, 999)},{rng.randint(1, 999)})"
+        elif roll < 0.40:
+            chunk = f"mul({rng.randint(1, 999)},{rng.randint(1, 999)}]"
+        elif roll < 0.43:
+            chunk = "don't()"
+        elif roll < 0.46:
+            chunk = "do()"
+        elif roll < 0.60:
+            chunk = rng.choice(decoys)
+        else:
+            chunk = "".join(rng.choices(noise, k=rng.randint(1, 4)))
+        chunks.append(chunk)
+        size += len(chunk)
+
+    data = "".join(chunks)[:length]
+    return "\n".join(data[i:i + line_length] for i in range(0, len(data), line_length)) + "\n"
+
+
+def day04(scale: int, rng: random.Random) -> str:
+    side = scaled_side(140, scale)
+    return "".join("".join(rng.choices("XMAS", k=side)) + "\n" for _ in range(side))
+
+
+def day05(scale: int, rng: random.Random) -> str:
+    # The real input has a complete ordering over 49 pages, so the rule count grows with the square of the pages
+    page_count = scaled_side(49, scale)
+    update_count = 185 * scale
+    longest = min(page_count, scaled_side(23, scale))
+
+    pages = rng.sample(range(10, 10 + page_count * 10), page_count)
+    rules = [(pages[i], pages[j]) for i in range(page_count) for j in range(i + 1, page_count)]
+    rng.shuffle(rules)
+
+    rank = {page: i for i, page in enumerate(pages)}
+    updates = []
+    for _ in range(update_count):
+        # Updates always have a middle page
+        length = rng.randrange(5, longest + 1) | 1
+        update = rng.sample(pages, min(length, page_count - (page_count + 1) % 2))
+        if rng.random() < 0.5:
+            update.sort(key=rank.__getitem__)
+        updates.append(",".join(map(str, update)))
+
+    return "".join(f"{x}|{y}\n" for x, y in rules) + "\n" + "\n".join(updates) + "\n"
+
+
+def guard_route(grid: list[bytearray], row: int, col: int) -> set[tuple[int, int]] | None:
+    """
+    Walk the guard until they leave the map or repeat a turn.
+
+    :param grid: Map rows, with obstacles as "#"
+    :param row: Guard starting row
+    :param col: Guard starting column
+    :return: Set of (row, col) cells walked through before leaving the map, or None if the guard patrols in
+        a loop
+    """
+    rows = len(grid)
+    cols = len(grid[0])
+    direction = 0
+    cells = {(row, col)}
+    turns = set()
+
+    while True:
+        d_row, d_col = GUARD_DIRECTIONS[direction]
+        next_row, next_col = row + d_row, col + d_col
+        if not (0 <= next_row < rows and 0 <= next_col < cols):
+            return cells
+
+        if grid[next_row][next_col] == ord("#"):
+            if (row, col, direction) in turns:
+                return None
+            turns.add((row, col, direction))
+            direction = (direction + 1) % 4
+            continue
+
+        row, col = next_row, next_col
+        cells.add((row, col))
+
+
+def spiral_route(grid: list[bytearray], margin: int, gap: int) -> tuple[int, int]:
+    """
+    Lay out obstacles that turn the guard along an inward clockwise spiral, then off the map.
+
+    Each lap runs ``gap`` cells inside the previous one, so the route covers about one cell in ``gap`` of
+    the grid and grows with its area.
+    :param grid: Empty map rows, obstacles are added in place
+    :param margin: Distance of the outermost lap from the edges of the map
+    :param gap: Distance between laps, at least 2 so no obstacle lands on an earlier lap
+    :return: Guard starting row and column, facing up
+    """
+    top, left = margin, margin
+    bottom, right = len(grid) - 1 - margin, len(grid[0]) - 1 - margin
+    start = bottom, left
+    row, col = start
+
+    # Each leg ends in front of an obstacle, after which the lap's side it ran along moves inward
+    while top <= bottom and left <= right:
+        grid[top - 1][col] = ord("#")
+        row, left = top, left + gap
+        if left > right:
+            break
+        grid[row][right + 1] = ord("#")
+        col, top = right, top + gap
+        if top > bottom:
+            break
+        grid[bottom + 1][col] = ord("#")
+        row, right = bottom, right - gap
+        if left > right:
+            break
+        grid[row][left - 1] = ord("#")
+        col, bottom = left, bottom - gap
+
+    return start
+
+
+def day06(scale: int, rng: random.Random) -> str:
+    side = scaled_side(130, scale)
+    density = 0.049
+    grid = [bytearray(b"." * side) for _ in range(side)]
+
+    # Random maps let guards escape after a few hundred cells whatever their size, so the route is laid out
+    # as a spiral whose length grows with the map, about a third of its cells like the real input
+    row, col = spiral_route(grid, rng.randint(1, 3), 3)
+    route = guard_route(grid, row, col)
+
+    # Scatter the other obstacles over cells the guard never enters, which leaves the route as it is
+    for obstacle_row, line in enumerate(grid):
+        for obstacle_col in range(side):
+            if (obstacle_row, obstacle_col) not in route and rng.random() < density:
+                line[obstacle_col] = ord("#")
+    grid[row][col] = ord("^")
+
+    return "".join(line.decode() + "\n" for line in grid)
+
+
+def day07(scale: int, rng: random.Random) -> str:
+    # Every tenfold increase in size adds two operands to the longest equations
+    longest = 12 + 2 * round(math.log10(scale))
+    lines = []
+
+    for _ in range(850 * scale):
+        numbers = [rng.choice([rng.randint(1, 9), rng.randint(10, 99), rng.randint(100, 999)])
+                   for _ in range(rng.randint(3, longest))]
+
+        target = numbers[0]
+        for number in numbers[1:]:
+            operation = rng.randrange(3)
+            if operation == 0:
+                target += number
+            elif operation == 1:
+                target *= number
+            else:
+                target = int(f"{target}{number}")
+
+        # Leave roughly a third of the equations unsolvable
+        if rng.random() < 0.35:
+            target += rng.randint(1, 9)
+
+        lines.append(f"{target}: {' '.join(map(str, numbers))}")
+
+    return "\n".join(lines) + "\n"
+
+
+def day08(scale: int, rng: random.Random) -> str:
+    side = scaled_side(50, scale)
+    density = 0.08
+    frequencies = FREQUENCIES[:52]
+    return "".join(
+        "".join(rng.choice(frequencies) if rng.random() < density else "." for _ in range(side)) + "\n"
+        for _ in range(side)
+    )
+
+
+GENERATORS = {
+    1: day01,
+    2: day02,
+    3: day03,
+    4: day04,
+    5: day05,
+    6: day06,
+    7: day07,
+    8: day08,
+}
+
+
+def generate(day: int, scale: int = 1, seed: int = DEFAULT_SEED) -> str:
+    """
+    Generate a synthetic puzzle input.
+
+    :param day: Day of the month
+    :param scale: Input size multiplier relative to the real puzzle input
+    :param seed: Random seed, the same seed always produces the same input
+    :return: Puzzle input text
+    """
+    if day not in GENERATORS:
+        raise ValueError(f"No input generator for day {day}")
+    if scale < 1:
+        raise ValueError(f"Scale must be at least 1, not {scale}")
+
+    return GENERATORS[day](scale, random.Random(f"{seed}-{day}-{scale}"))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="aoc.generate", description="Generate scaled synthetic puzzle inputs.")
+    parser.add_argument("day", type=int, choices=sorted(GENERATORS), help="Day to generate input for")
+    parser.add_argument("-s", "--scale", type=int, default=1, help="Size multiplier relative to the real input")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    parser.add_argument("-o", "--output", type=Path, help="File to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    text = generate(args.day, args.scale, args.seed)
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        args.output.write_text(text)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+Compact character grid shared by the grid based days.
+
+The grid is stored as a single flat bytearray, one byte per cell, surrounded by a border of padding cells.
+Moving in any direction is adding a constant offset to a flat index, and walking off the edge of the grid
+lands on padding rather than outside the array, so hot loops need no bounds checks.
+"""
+
+from array import array
+from typing import Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Byte value of the padding cells around the grid
+PAD = 0
+
+
+class Grid:
+    """
+    Rectangular grid of single byte cells in row-major order, with ``pad`` cells of padding on every side.
+
+    Cells are addressed by flat index. ``index()`` and ``position()`` convert between flat indices and
+    (row, col) positions within the unpadded grid.
+    """
+
+    __slots__ = ("rows", "cols", "pad", "stride", "cells")
+
+    def __init__(self, rows: int, cols: int, cells: bytearray, pad: int = 1):
+        self.rows = rows
+        self.cols = cols
+        self.pad = pad
+        self.stride = cols + 2 * pad
+        self.cells = cells
+
+    @classmethod
+    def parse(cls, text: str | bytes, pad: int = 1) -> "Grid":
+        """
+        Build a grid from lines of text.
+
+        :param text: Grid rows, one per line
+        :param pad: Width of the padding border
+        :return: Padded grid
+        """
+        if isinstance(text, str):
+            text = text.encode()
+        lines = text.split()
+        cols = len(lines[0]) if lines else 0
+        if any(len(line) != cols for line in lines):
+            raise ValueError("Grid rows must all be the same length")
+
+        border = bytes([PAD]) * pad
+        blank_row = bytes([PAD]) * (cols + 2 * pad)
+        cells = bytearray(blank_row * pad)
+        cells += b"".join(border + line + border for line in lines)
+        cells += blank_row * pad
+
+        return cls(len(lines), cols, cells, pad)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def __getitem__(self, index: int) -> int:
+        return self.cells[index]
+
+    def __setitem__(self, index: int, value: int):
+        self.cells[index] = value
+
+    def index(self, row: int, col: int) -> int:
+        """
+        Convert a position in the grid into a flat index.
+
+        :param row: Row within the unpadded grid
+        :param col: Column within the unpadded grid
+        :return: Flat index of the cell
+        """
+        return (row + self.pad) * self.stride + col + self.pad
+
+    def position(self, index: int) -> tuple[int, int]:
+        """
+        Convert a flat index into a position in the grid.
+
+        :param index: Flat index of a cell
+        :return: Row, column position within the unpadded grid
+        """
+        row, col = divmod(index, self.stride)
+        return row - self.pad, col - self.pad
+
+    def step(self, d_row: int, d_col: int) -> int:
+        """
+        Get the flat index offset of a move.
+
+        :param d_row: Row change
+        :param d_col: Column change
+        :return: Offset to add to a flat index
+        """
+        return d_row * self.stride + d_col
+
+    def find(self, chars: bytes, start: int = 0) -> int:
+        """
+        Find the first cell holding any of the given characters.
+
+        :param chars: Characters to look for
+        :param start: Flat index to start searching from
+        :return: Flat index of the first match, or -1 if there is none
+        """
+        found = [index for index in (self.cells.find(char, start) for char in chars) if index >= 0]
+        return min(found, default=-1)
+
+    def find_all(self, char: int) -> Iterator[int]:
+        """
+        Find every cell holding a character.
+
+        :param char: Character code to look for
+        :return: Generator of flat indices, in order
+        """
+        index = self.cells.find(char)
+        while index >= 0:
+            yield index
+            index = self.cells.find(char, index + 1)
+
+    def lines(self, step: int) -> Iterator[tuple[bytes, int]]:
+        """
+        Walk every maximal run of grid cells along a direction.
+
+        Taking every step'th cell from each starting offset visits each cell once, and the padding splits
+        those sequences into the grid's rows, columns or diagonals.
+        :param step: Flat index offset of the direction, such as 1, stride, stride + 1 or stride - 1
+        :return: Generator of (line contents, flat index of the line's first cell)
+        """
+        for offset in range(step):
+            index = offset
+            for line in self.cells[offset::step].split(bytes([PAD])):
+                if line:
+                    yield bytes(line), index
+                index += (len(line) + 1) * step
+
+    def array(self):
+        """
+        View the grid as a two-dimensional numpy array, without the padding and without copying.
+
+        :return: uint8 array of shape (rows, cols)
+        """
+        padded = np.frombuffer(self.cells, dtype=np.uint8).reshape(-1, self.stride)
+        return padded[self.pad:self.pad + self.rows, self.pad:self.pad + self.cols]
+
+    def fields(self) -> dict:
+        """
+        Get the buffers describing the grid, for the parse cache.
+
+        :return: Cells and dimensions by name
+        """
+        return {"cells": self.cells, "shape": array("q", [self.rows, self.cols, self.pad])}
+
+    @classmethod
+    def from_fields(cls, fields: dict) -> "Grid":
+        """
+        Rebuild a grid from the buffers returned by ``fields()``.
+
+        :param fields: Cells and dimensions by name
+        :return: Grid with its own copy of the cells
+        """
+        rows, cols, pad = fields["shape"]
+        return cls(rows, cols, bytearray(fields["cells"]), pad)
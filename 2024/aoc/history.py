@@ -0,0 +1,292 @@
+"""
+Benchmark history store and regression check.
+
+``aoc.bench`` appends every run to an SQLite database, one row per stage timing, keyed by commit, day, stage,
+input scale, backend and worker count. ``compare`` then checks one commit's timings against a baseline's.
+A stage has regressed when its median time is both more than a threshold slower and slower by more than a
+few robust standard deviations, estimated from the median absolute deviation (MAD) of both sets of runs.
+The spread is never taken as less than a small fraction of the baseline median, so identical repeats don't
+make every change significant, and stages with fewer than a few runs on either side are reported as having
+insufficient runs rather than judged. The command exits with status 1 when anything regressed, so it can
+gate a change.
+
+    python -m aoc.bench 6 --scales 10 --repeat 5
+    python -m aoc.history list
+    python -m aoc.history compare 1a2b3c4
+"""
+
+import argparse
+import math
+import sqlite3
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from aoc.cache import DEFAULT_DIR
+from aoc.runner import format_duration
+
+DEFAULT_DB = DEFAULT_DIR / "history.sqlite"
+DEFAULT_THRESHOLD = 0.05
+DEFAULT_SIGMAS = 3.0
+# Scales a MAD to a standard deviation for normally distributed timings
+MAD_SCALE = 1.4826
+# Smallest spread assumed, as a fraction of the baseline median
+MIN_SPREAD = 0.01
+# Runs needed on each side to judge a change
+MIN_RUNS = 3
+
+REGRESSED = "regressed"
+INSUFFICIENT = "insufficient runs"
+OK = "ok"
+
+STAGES = ("parse", "solve", "part1", "part2", "total")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    recorded_at TEXT NOT NULL,
+    commit_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    scale INTEGER NOT NULL,
+    input_bytes INTEGER NOT NULL,
+    backend TEXT NOT NULL,
+    workers INTEGER NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_key ON runs (commit_id, day, stage, scale, backend, workers);
+"""
+
+
+def current_commit(directory: Path | None = None) -> str:
+    """
+    Identify the checked out commit, marking it dirty if the working tree has changes.
+
+    :param directory: Directory inside the repository
+    :return: Short commit hash, or "unknown" outside a git repository
+    """
+    directory = directory or Path(__file__).resolve().parent
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=directory, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=directory).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+    return f"{commit}-dirty" if dirty else commit
+
+
+def mad(values: list[float]) -> float:
+    """
+    Median absolute deviation, a spread estimate that ignores outliers.
+
+    :param values: Samples
+    :return: Median distance of the samples from their median
+    """
+    middle = statistics.median(values)
+    return statistics.median(abs(value - middle) for value in values)
+
+
+class History:
+    """
+    SQLite store of benchmark timings.
+    """
+
+    __slots__ = ("connection",)
+
+    def __init__(self, path: Path = DEFAULT_DB):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, commit: str, record: dict):
+        """
+        Append a benchmark run's stage timings.
+
+        :param commit: Commit the run measured
+        :param record: Result record from ``aoc.bench``
+        """
+        # Days without a solve stage have no solve time to record
+        timings = {stage: record[f"{stage}_time"] for stage in STAGES[:-1] if record.get(f"{stage}_time") is not None}
+        timings["total"] = sum(timings.values())
+        recorded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO runs (recorded_at, commit_id, day, stage, scale, input_bytes, backend, workers, seconds)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (recorded_at, commit, record["day"], stage, record["scale"], record["input_bytes"],
+                     record["backend"], record["workers"], seconds)
+                    for stage, seconds in timings.items()
+                ],
+            )
+
+    def commits(self) -> list[tuple[str, str, int]]:
+        """
+        List the recorded commits, most recent first.
+
+        :return: List of (commit, last recorded time, number of runs)
+        """
+        return self.connection.execute(
+            "SELECT commit_id, MAX(recorded_at), COUNT(*) FROM runs WHERE stage = 'total'"
+            " GROUP BY commit_id ORDER BY MAX(recorded_at) DESC, MAX(id) DESC"
+        ).fetchall()
+
+    def resolve(self, commit: str | None) -> str:
+        """
+        Find the recorded commit a name or hash prefix refers to.
+
+        :param commit: Commit hash or prefix, or None for the most recently recorded commit
+        :return: Recorded commit
+        """
+        recorded = [row[0] for row in self.commits()]
+        if commit is None:
+            if not recorded:
+                raise LookupError("No benchmark runs have been recorded")
+            return recorded[0]
+        if commit in recorded:
+            return commit
+
+        matches = [candidate for candidate in recorded if candidate.startswith(commit)]
+        if len(matches) != 1:
+            raise LookupError(f"{commit!r} matches {len(matches)} recorded commits: {', '.join(matches) or 'none'}")
+        return matches[0]
+
+    def samples(self, commit: str) -> dict[tuple, list[float]]:
+        """
+        Get a commit's timings.
+
+        :param commit: Recorded commit
+        :return: Timings by (day, stage, scale, backend, workers)
+        """
+        samples = {}
+        for *key, seconds in self.connection.execute(
+            "SELECT day, stage, scale, backend, workers, seconds FROM runs WHERE commit_id = ?", (commit,)
+        ):
+            samples.setdefault(tuple(key), []).append(seconds)
+
+        return samples
+
+
+def compare(
+    baseline: dict[tuple, list[float]], candidate: dict[tuple, list[float]],
+    threshold: float = DEFAULT_THRESHOLD, sigmas: float = DEFAULT_SIGMAS, min_runs: int = MIN_RUNS,
+) -> list[dict]:
+    """
+    Compare the timings measured under the same conditions for two commits.
+
+    :param baseline: Baseline timings by key
+    :param candidate: Candidate timings by key
+    :param threshold: Relative slowdown of the median that counts as a regression
+    :param sigmas: Robust standard deviations the slowdown must also exceed
+    :param min_runs: Runs needed on each side to judge a change
+    :return: Comparison for each key both commits measured, in key order, with a status of regressed, ok or
+        insufficient runs
+    """
+    comparisons = []
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        before_median, after_median = statistics.median(before), statistics.median(after)
+        change = after_median - before_median
+        spread = max(MAD_SCALE * math.hypot(mad(before), mad(after)), MIN_SPREAD * before_median)
+
+        if min(len(before), len(after)) < min_runs:
+            status = INSUFFICIENT
+        elif change > threshold * before_median and change > sigmas * spread:
+            status = REGRESSED
+        else:
+            status = OK
+
+        comparisons.append({
+            "key": key,
+            "baseline": before_median,
+            "candidate": after_median,
+            "ratio": after_median / before_median if before_median else math.inf,
+            "status": status,
+            "runs": (len(before), len(after)),
+        })
+
+    return comparisons
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="aoc.history", description="Inspect benchmark history and find regressions.")
+    parser.add_argument("--history", type=Path, default=DEFAULT_DB, help=f"History database (default: {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List the recorded commits")
+
+    compare_parser = commands.add_parser("compare", help="Check a commit's timings against a baseline commit")
+    compare_parser.add_argument("baseline", help="Baseline commit hash or prefix")
+    compare_parser.add_argument("candidate", nargs="?", help="Commit to check (default: the most recently recorded)")
+    compare_parser.add_argument(
+        "-t", "--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown that counts as a regression"
+    )
+    compare_parser.add_argument(
+        "--sigmas", type=float, default=DEFAULT_SIGMAS, help="Robust standard deviations a slowdown must exceed"
+    )
+    compare_parser.add_argument(
+        "--min-runs", type=int, default=MIN_RUNS, help="Runs needed on each side to judge a change"
+    )
+    compare_parser.add_argument("--stage", choices=STAGES, action="append", help="Stages to check (default: all)")
+    args = parser.parse_args(argv)
+
+    history = History(args.history)
+    try:
+        if args.command == "list":
+            for commit, recorded_at, runs in history.commits():
+                print(f"{commit:<16} {recorded_at}  {runs} runs")
+            return 0
+
+        try:
+            baseline = history.resolve(args.baseline)
+            candidate = history.resolve(args.candidate)
+        except LookupError as ex:
+            parser.error(str(ex))
+        comparisons = compare(
+            history.samples(baseline), history.samples(candidate), args.threshold, args.sigmas, args.min_runs
+        )
+    finally:
+        history.close()
+
+    stages = set(args.stage or STAGES)
+    comparisons = [comparison for comparison in comparisons if comparison["key"][1] in stages]
+    if not comparisons:
+        print(f"No timings measured under the same conditions for {baseline} and {candidate}")
+        return 0
+
+    print(f"Baseline {baseline}, candidate {candidate}")
+    print(f"{'day':>3} {'stage':>6} {'scale':>6} {'backend':>7} {'workers':>7} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    regressions = insufficient = 0
+    for comparison in comparisons:
+        day, stage, scale, backend, workers = comparison["key"]
+        status = comparison["status"]
+        regressions += status == REGRESSED
+        insufficient += status == INSUFFICIENT
+        if status == REGRESSED:
+            note = "  REGRESSED"
+        elif status == INSUFFICIENT:
+            note = f"  insufficient runs ({comparison['runs'][0]} and {comparison['runs'][1]})"
+        else:
+            note = ""
+        print(
+            f"{day:>3} {stage:>6} {scale:>6} {backend:>7} {workers:>7}"
+            f" {format_duration(comparison['baseline']):>10} {format_duration(comparison['candidate']):>10}"
+            f" {comparison['ratio'] - 1:>+7.1%}{note}"
+        )
+
+    print(f"{regressions} regression{'s' if regressions != 1 else ''}", end="")
+    print(f", {insufficient} with insufficient runs" if insufficient else "")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
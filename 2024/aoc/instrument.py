@@ -0,0 +1,208 @@
+"""
+Per-function timing, allocation and profiling instrumentation for the day modules.
+
+When enabled, every function and method defined in a day module is replaced by a wrapper counting its calls
+and its inclusive wall time, and optionally the memory it leaves allocated as seen by ``tracemalloc``. The
+parse, solve and part stages also record their ``tracemalloc`` peak and the lines holding the most memory
+when they finish, and the whole run can be recorded with ``cProfile``. Each day writes a JSON report,
+``day-XX.json``, plus ``day-XX.prof`` when profiling.
+
+Nothing is wrapped unless instrumentation is enabled, so it costs nothing otherwise. Enable it with the
+runner's ``--instrument DIR`` option or the ``AOC_INSTRUMENT`` environment variable, and add memory tracing
+or profiling with ``--trace-memory`` and ``--profile`` or ``AOC_TRACE_MEMORY`` and ``AOC_PROFILE``.
+
+Work done in worker processes is not recorded, since each worker has its own copy of the wrappers.
+"""
+
+import cProfile
+import functools
+import inspect
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, TypeVar
+
+INSTRUMENT_VARIABLE = "AOC_INSTRUMENT"
+TRACE_MEMORY_VARIABLE = "AOC_TRACE_MEMORY"
+PROFILE_VARIABLE = "AOC_PROFILE"
+
+STAGES = ("load", "parse", "solve", "part1", "part2")
+TOP_ALLOCATIONS = 10
+
+T = TypeVar("T")
+
+
+@dataclass
+class FunctionStats:
+    calls: int = 0
+    time: float = 0.0
+    allocated_bytes: int = 0
+    # Calls currently running, so recursive calls aren't timed twice
+    depth: int = field(default=0, repr=False)
+
+
+@dataclass
+class StageStats:
+    peak_bytes: int = 0
+    top_allocations: list[dict] = field(default_factory=list)
+
+
+class Instrumentation:
+    """
+    Collects statistics for one day at a time and writes a report for each.
+    """
+
+    __slots__ = ("directory", "memory", "profile", "functions", "stages", "originals")
+
+    def __init__(self, directory: Path, memory: bool = False, profile: bool = False):
+        self.directory = Path(directory)
+        self.memory = memory
+        self.profile = profile
+        self.functions = {}
+        self.stages = {}
+        self.originals = []
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """
+        Wrap a function to record its calls, time and allocations.
+
+        :param name: Qualified name to report the function under
+        :param func: Function to wrap
+        :return: The wrapper
+        """
+        stats = self.functions.setdefault(name, FunctionStats())
+        memory = self.memory
+        stage = name in STAGES and self.record_stage
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stats.calls += 1
+            if stats.depth:
+                return func(*args, **kwargs)
+
+            stats.depth += 1
+            if memory:
+                if stage:
+                    tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.time += time.perf_counter() - start
+                stats.depth -= 1
+                if memory:
+                    stats.allocated_bytes += tracemalloc.get_traced_memory()[0] - before
+                    if stage:
+                        stage(name)
+
+        return wrapper
+
+    def record_stage(self, name: str):
+        """
+        Record the memory peak of a stage that just finished, and where the memory it left behind lives.
+
+        :param name: Stage name
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        self.stages[name] = StageStats(
+            peak_bytes=tracemalloc.get_traced_memory()[1],
+            top_allocations=[
+                {"location": str(statistic.traceback[0]), "size": statistic.size, "count": statistic.count}
+                for statistic in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+            ],
+        )
+
+    def attach(self, module: ModuleType):
+        """
+        Replace the functions and methods defined in a module with instrumented wrappers.
+
+        :param module: Day module to instrument
+        """
+        for name, value in list(vars(module).items()):
+            if getattr(value, "__module__", None) != module.__name__:
+                continue
+
+            if isinstance(value, type):
+                for attribute, method in list(vars(value).items()):
+                    if (
+                            inspect.isfunction(method) and method.__module__ == module.__name__ and
+                            (attribute == "__init__" or not attribute.startswith("__"))
+                    ):
+                        self.originals.append((value, attribute, method))
+                        setattr(value, attribute, self.wrap(f"{name}.{attribute}", method))
+            elif callable(value):
+                self.originals.append((module, name, value))
+                setattr(module, name, self.wrap(name, value))
+
+    def detach(self):
+        """
+        Put back every function replaced by ``attach()``.
+        """
+        for owner, name, original in reversed(self.originals):
+            setattr(owner, name, original)
+        self.originals.clear()
+
+    def measure(self, day: int, module: ModuleType, run: Callable[[], T]) -> T:
+        """
+        Run a day with its module instrumented, then write its report.
+
+        :param day: Day of the month
+        :param module: The day's solution module
+        :param run: Runs the day and returns its result
+        :return: The run's result
+        """
+        self.functions = {}
+        self.stages = {}
+        profiler = cProfile.Profile() if self.profile else None
+        tracing = self.memory and not tracemalloc.is_tracing()
+
+        self.attach(module)
+        if tracing:
+            tracemalloc.start()
+        try:
+            if profiler is not None:
+                result = profiler.runcall(run)
+            else:
+                result = run()
+        finally:
+            if tracing:
+                tracemalloc.stop()
+            self.detach()
+
+        self.write_report(day, profiler)
+        return result
+
+    def write_report(self, day: int, profiler: cProfile.Profile | None = None) -> Path:
+        """
+        Write the statistics collected for a day.
+
+        :param day: Day of the month
+        :param profiler: Profiler that recorded the run, if profiling
+        :return: Path of the JSON report
+        """
+        report = {
+            "day": day,
+            "functions": {
+                name: {key: value for key, value in asdict(stats).items() if key != "depth"}
+                for name, stats in sorted(self.functions.items(), key=lambda item: -item[1].time)
+                if stats.calls
+            },
+            "stages": {name: asdict(stats) for name, stats in self.stages.items()},
+        }
+
+        if profiler is not None:
+            profile_path = self.directory / f"day-{day:02d}.prof"
+            profiler.dump_stats(profile_path)
+            report["profile"] = str(profile_path)
+
+        path = self.directory / f"day-{day:02d}.json"
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        return path
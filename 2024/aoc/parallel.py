@@ -0,0 +1,50 @@
+"""
+Process pool helpers shared by the solutions that spread work across cores.
+
+Day modules are loaded from file paths rather than imported by name, so workers are forked where the
+platform allows it. Forked workers inherit the loaded day modules and anything handed to their initializer
+without a pickling round-trip.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def cpu_count() -> int:
+    """
+    Get the number of cores this process may run on.
+
+    :return: Usable core count
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def process_pool(workers: int, initializer=None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    Create a process pool, forking the workers when the platform supports it.
+
+    :param workers: Number of worker processes
+    :param initializer: Function each worker runs once on start, typically to receive shared state
+    :param initargs: Arguments for the initializer
+    :return: Process pool executor
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return ProcessPoolExecutor(workers, mp_context=context, initializer=initializer, initargs=initargs)
+
+
+def chunked(items: list, workers: int, per_worker: int = 4) -> list[list]:
+    """
+    Split work into contiguous chunks, a few per worker so uneven chunks still balance out.
+
+    :param items: Work items to split
+    :param workers: Number of worker processes
+    :param per_worker: Number of chunks to create for each worker
+    :return: List of chunks
+    """
+    size = max(1, -(-len(items) // (workers * per_worker)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
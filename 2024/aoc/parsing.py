@@ -0,0 +1,242 @@
+"""
+Bulk integer parsing for the line oriented days.
+
+Inputs are handled as bytes, memory mapped when they come from a file. Every run of digits is an integer,
+negative when a minus sign comes right before it, and any other byte separates integers, while newlines also
+separate rows. The same parser reads ``3   4``, ``47|53``, ``75,47,61`` and ``190: 10 19`` lines.
+
+``int_rows()`` extracts every integer at once into an ``array("q")`` with the offset of each row's first
+value, and ``int_values()`` does the same without tracking rows. With numpy installed it scans the digits
+straight out of the mapped file without decoding it or calling ``int()`` per token. ``records()`` instead
+yields one row at a time as a list of ints, for solvers that stream their input, and has no limit on the
+size of each integer.
+"""
+
+import itertools
+import mmap
+import re
+from array import array
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NEWLINE = ord("\n")
+MINUS = ord("-")
+ZERO, NINE = ord("0"), ord("9")
+# Digits in the largest integer that always fits in 64 bits
+MAX_DIGITS = 18
+# What the character codes of an integer's digits add up to over and above its value, by its digit count
+ZERO_REPUNITS = np.array([ZERO * (10 ** width - 1) // 9 for width in range(MAX_DIGITS + 1)]) if np else None
+
+# Maps every byte other than digits and newlines to a space, so splitting on whitespace finds the integers
+SEPARATORS = bytes(byte if ZERO <= byte <= NINE or byte == NEWLINE else ord(" ") for byte in range(256))
+INTEGER = re.compile(rb"-?[0-9]+")
+
+
+def map_input(path: Path) -> mmap.mmap | bytes:
+    """
+    Map an input file into memory, read-only.
+
+    :param path: Puzzle input file
+    :return: Memory map of the file, or empty bytes for an empty file, which can't be mapped
+    """
+    with open(path, "rb") as file:
+        if not file.seek(0, 2):
+            return b""
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class IntRows:
+    """
+    Integers of every row back to back, with the offset of each row's first integer.
+    """
+
+    __slots__ = ("values", "offsets")
+
+    def __init__(self, values: array, offsets: array):
+        self.values = values
+        # One more offset than there are rows, the last being the total number of values
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> array:
+        return self.values[self.offsets[row]:self.offsets[row + 1]]
+
+    def __iter__(self) -> Iterator[array]:
+        values = self.values
+        for start, end in itertools.pairwise(self.offsets):
+            yield values[start:end]
+
+    def lengths(self) -> array:
+        """
+        Count the integers in each row.
+
+        :return: Array of row lengths
+        """
+        if np is not None:
+            return as_array(np.diff(np.frombuffer(self.offsets, dtype=np.int64)))
+        return array("q", [end - start for start, end in itertools.pairwise(self.offsets)])
+
+    def tolist(self) -> list[list[int]]:
+        """
+        Convert the rows to lists of ints.
+
+        :return: List of rows
+        """
+        values = self.values.tolist()
+        return [values[start:end] for start, end in itertools.pairwise(self.offsets)]
+
+    def array(self):
+        """
+        View the values as a numpy array, without copying.
+
+        :return: int64 array of every value
+        """
+        return np.frombuffer(self.values, dtype=np.int64)
+
+
+def split_integers(line: bytes) -> list[bytes]:
+    """
+    Find the integers in a line of input.
+
+    :param line: Line of input
+    :return: Each integer's characters
+    """
+    # Splitting on separators is quicker, but can't tell minus signs from dashes
+    if b"-" in line:
+        return INTEGER.findall(line)
+    return line.translate(SEPARATORS).split()
+
+
+def as_array(values) -> array:
+    """
+    Copy a numpy int64 array into an ``array("q")``.
+
+    :param values: int64 array
+    :return: Array holding the same values
+    """
+    result = array("q")
+    result.frombytes(memoryview(values).cast("B"))
+    return result
+
+
+def int_values(data: str | bytes | bytearray | mmap.mmap) -> array:
+    """
+    Extract every integer in the input, regardless of which row it is on.
+
+    :param data: Puzzle input
+    :return: Every integer in order
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    if np is not None:
+        values, _ = scan_integers(data)
+        return as_array(values)
+
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    return array("q", map(int, split_integers(data)))
+
+
+def int_rows(data: str | bytes | bytearray | mmap.mmap) -> IntRows:
+    """
+    Extract every integer in the input, row by row.
+
+    A trailing newline doesn't start another row, but blank lines are kept as empty rows.
+    :param data: Puzzle input
+    :return: Integers and row offsets
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    if np is not None:
+        values, starts = scan_integers(data)
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        # Lines start at the beginning and after every newline, except a trailing one
+        line_starts = np.concatenate(([0], np.flatnonzero(buffer == NEWLINE) + 1))
+        if line_starts[-1] == len(buffer):
+            line_starts = line_starts[:-1]
+        # Each row's values start at the first integer at or after the start of its line
+        offsets = np.append(np.searchsorted(starts, line_starts), len(starts))
+        return IntRows(as_array(values), as_array(offsets.astype(np.int64)))
+
+    if not isinstance(data, bytes):
+        data = bytes(data)
+    lines = data.split(b"\n")
+    if not data or data.endswith(b"\n"):
+        lines.pop()
+
+    rows = list(map(split_integers, lines))
+    offsets = array("q", [0])
+    offsets.extend(itertools.accumulate(map(len, rows)))
+    return IntRows(array("q", map(int, itertools.chain.from_iterable(rows))), offsets)
+
+
+def scan_integers(data) -> tuple:
+    """
+    Extract every integer in the input with vectorised scans over its bytes.
+
+    :param data: Puzzle input as bytes or any other byte buffer
+    :return: Tuple of int64 arrays of the integers and the position each starts at
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    digit = (buffer >= ZERO) & (buffer <= NINE)
+    # Integers start and end wherever a digit meets a non-digit, including the ends of the input
+    edges = np.empty(len(buffer) + 1, dtype=bool)
+    edges[0], edges[-1] = digit[:1].any(), digit[-1:].any()
+    np.not_equal(digit[1:], digit[:-1], out=edges[1:-1])
+    edges = np.flatnonzero(edges)
+    starts, ends = edges[0::2], edges[1::2]
+    widths = ends - starts
+    width = int(widths.max(initial=0))
+    if width > MAX_DIGITS:
+        raise OverflowError(f"Integers of {width} digits don't fit in 64 bits, use records() instead")
+
+    # Add the digits into every value at once, from the units column up, then take off the character
+    # code of zero for every digit. Only the columns some integers are too short for need to pick out
+    # the integers that have them
+    values = np.zeros(len(starts), dtype=np.int64)
+    term = np.empty_like(values)
+    index = ends - 1
+    shortest = int(widths.min()) if len(widths) else 0
+    for column in range(width):
+        if column < shortest:
+            np.multiply(buffer[index], 10 ** column, out=term, dtype=np.int64)
+            values += term
+        else:
+            wide = np.flatnonzero(widths > column)
+            values[wide] += buffer[index[wide]].astype(np.int64) * 10 ** column
+        index -= 1
+    values -= ZERO_REPUNITS[widths]
+
+    if data.find(b"-") >= 0:
+        signed = np.flatnonzero(starts > 0)
+        signed = signed[buffer[starts[signed] - 1] == MINUS]
+        values[signed] *= -1
+
+    return values, starts
+
+
+def records(data: str | bytes | bytearray | mmap.mmap) -> Iterator[list[int]]:
+    """
+    Extract the integers of the input one row at a time.
+
+    Only the current row is ever decoded, so memory use doesn't grow with the input.
+    :param data: Puzzle input
+    :return: Generator of each row's integers, with an empty list for a blank line
+    """
+    if isinstance(data, str):
+        data = data.encode()
+
+    start = 0
+    while start < len(data):
+        end = data.find(b"\n", start)
+        if end < 0:
+            end = len(data)
+        yield list(map(int, split_integers(data[start:end])))
+        start = end + 1
@@ -0,0 +1,323 @@
+"""
+Load the daily solutions as modules and run them with a timing harness.
+
+A day module lives in ``day-XX/solution.py`` and exposes three functions:
+
+* ``parse(text)`` turns the puzzle input into whatever structure the solver needs
+* ``part1(parsed)`` returns the answer to part 1
+* ``part2(parsed)`` returns the answer to part 2
+
+A module may also define ``load(path)`` to read the input file itself, for example to stream it, in which
+case the runner calls it in place of reading the file and calling ``parse``.
+
+Work both parts share, such as a single pass that finds both answers, goes in an optional ``solve(parsed)``.
+The runner times it as a stage of its own and hands its result to both parts in place of the parsed input.
+
+The parsed value is shared by both parts, so parts must not modify it. Parts may also accept keyword
+options such as ``workers`` or ``backend``; the runner only passes the options a part's signature asks for.
+
+Days that define ``PARSER_VERSION``, ``encode`` and ``decode`` can have their parsed input cached between
+runs, see ``aoc.cache``.
+"""
+
+import argparse
+import importlib.util
+import inspect
+import json
+import os
+import resource
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import ModuleType
+
+from aoc.backends import BACKENDS, PYTHON
+from aoc.cache import DEFAULT_DIR, DEFAULT_LIMIT, ParseCache
+from aoc.instrument import INSTRUMENT_VARIABLE, PROFILE_VARIABLE, TRACE_MEMORY_VARIABLE, Instrumentation
+
+YEAR_DIR = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class DayResult:
+    day: int
+    part1: object
+    part2: object
+    parse_time: float
+    part1_time: float
+    part2_time: float
+    # Only days with a solve stage have a solve time
+    solve_time: float | None = None
+
+    @property
+    def total_time(self) -> float:
+        return self.parse_time + (self.solve_time or 0.0) + self.part1_time + self.part2_time
+
+
+def day_dir(day: int) -> Path:
+    """
+    Get the directory holding a day's solution and input.
+
+    :param day: Day of the month
+    :return: Path to the day's directory
+    """
+    return YEAR_DIR / f"day-{day:02d}"
+
+
+def available_days() -> list[int]:
+    """
+    Find every day with a solution module.
+
+    :return: Sorted list of day numbers
+    """
+    return sorted(int(path.parent.name[4:]) for path in YEAR_DIR.glob("day-[0-9][0-9]/solution.py"))
+
+
+def load_day(day: int) -> ModuleType:
+    """
+    Import a day's solution module. Modules are cached, so repeated loads are free.
+
+    :param day: Day of the month
+    :return: The imported solution module
+    """
+    name = f"day{day:02d}"
+    if name in sys.modules:
+        return sys.modules[name]
+
+    path = day_dir(day) / "solution.py"
+    if not path.exists():
+        raise FileNotFoundError(f"No solution for day {day} at {path}")
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Register before executing so worker processes and pickling can find the module by name
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+
+    return module
+
+
+def accepted_options(func, options: dict) -> dict:
+    """
+    Filter options down to the keyword arguments a function accepts.
+
+    :param func: Function that will be called
+    :param options: Candidate keyword arguments
+    :return: Keyword arguments present in the function's signature
+    """
+    parameters = inspect.signature(func).parameters
+    return {name: value for name, value in options.items() if name in parameters}
+
+
+def timed(func, *args, **kwargs) -> tuple[object, float]:
+    """
+    Call a function and measure its wall time.
+
+    :param func: Function to call
+    :param args: Positional arguments for the function
+    :param kwargs: Keyword arguments for the function
+    :return: Tuple of the function's return value and elapsed seconds
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def parse_input(module: ModuleType, day: int, input_path: Path, options: dict, cache: ParseCache | None = None):
+    """
+    Read and parse a day's input, going through the parse cache when there is one and the day supports it.
+
+    :param module: The day's solution module
+    :param day: Day of the month
+    :param input_path: Puzzle input file
+    :param options: Keyword options passed to the parser if it accepts them
+    :param cache: Cache of parsed inputs
+    :return: The parsed input
+    """
+    streams = hasattr(module, "load")
+    parser = module.load if streams else module.parse
+    parse_options = accepted_options(parser, options)
+    if cache is None or not hasattr(module, "PARSER_VERSION"):
+        return parser(input_path if streams else input_path.read_text(), **parse_options)
+
+    data = input_path.read_bytes()
+    key = cache.key(day, data, module.PARSER_VERSION, parse_options)
+    fields = cache.get(key)
+    if fields is not None:
+        try:
+            return module.decode(fields, **accepted_options(module.decode, parse_options))
+        except Exception:
+            # A bad entry is a miss, parsing again below replaces it
+            pass
+
+    parsed = parser(input_path if streams else data.decode(), **parse_options)
+    fields = module.encode(parsed, **accepted_options(module.encode, parse_options))
+    if fields is not None:
+        cache.put(key, fields)
+
+    return parsed
+
+
+def solve_input(module: ModuleType, parsed, options: dict):
+    """
+    Run a day's shared solve stage, if it has one.
+
+    :param module: The day's solution module
+    :param parsed: The parsed input
+    :param options: Keyword options passed to the solve stage if it accepts them
+    :return: What the parts are given, the solve stage's result or else the parsed input itself
+    """
+    if not hasattr(module, "solve"):
+        return parsed
+    return module.solve(parsed, **accepted_options(module.solve, options))
+
+
+def run_day(
+    day: int, input_path: Path | None = None, options: dict | None = None, cache: ParseCache | None = None
+) -> DayResult:
+    """
+    Parse a day's input and solve both parts, timing each stage separately.
+
+    :param day: Day of the month
+    :param input_path: Puzzle input to use instead of the day's own input file
+    :param options: Keyword options passed to the stages that accept them
+    :param cache: Cache of parsed inputs, if parsing should go through one
+    :return: Answers and timings for the day
+    """
+    module = load_day(day)
+    options = options or {}
+    if input_path is None:
+        input_path = day_dir(day) / "input"
+
+    parsed, parse_time = timed(parse_input, module, day, Path(input_path), options, cache)
+    parsed, solve_time = timed(solve_input, module, parsed, options)
+    part1, part1_time = timed(module.part1, parsed, **accepted_options(module.part1, options))
+    part2, part2_time = timed(module.part2, parsed, **accepted_options(module.part2, options))
+
+    return DayResult(
+        day, part1, part2, parse_time, part1_time, part2_time, solve_time if hasattr(module, "solve") else None
+    )
+
+
+def peak_rss() -> int:
+    """
+    Get the peak resident set size of this process.
+
+    :return: Peak RSS in bytes
+    """
+    # getrusage carries the parent's high-water mark across fork and exec, VmHWM starts fresh with this process
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kibibytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Format a duration with a unit suited to its magnitude.
+
+    :param seconds: Duration in seconds
+    :return: Human-readable duration
+    """
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def parse_days(values: list[str]) -> list[int]:
+    """
+    Expand day arguments such as "3" or "1-5" into day numbers.
+
+    :param values: Day arguments from the command line
+    :return: Sorted list of unique day numbers
+    """
+    days = set()
+    for value in values:
+        first, _, last = value.partition("-")
+        days.update(range(int(first), int(last or first) + 1))
+
+    return sorted(days)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="aoc", description="Run and time Advent of Code 2024 solutions.")
+    parser.add_argument("days", nargs="*", help="Days to run, e.g. 6 or 1-5 (default: every day)")
+    parser.add_argument("-i", "--input", type=Path, help="Input file to use instead of the day's input")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Worker processes for days that run in parallel")
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default=PYTHON, help="Implementation for days that offer several")
+    parser.add_argument(
+        "--cache", type=Path, nargs="?", const=DEFAULT_DIR, metavar="DIR",
+        help=f"Reuse parsed inputs from a cache directory (default: {DEFAULT_DIR})",
+    )
+    parser.add_argument(
+        "--cache-limit", type=int, default=DEFAULT_LIMIT >> 20, metavar="MIB", help="Size limit of the parse cache"
+    )
+    parser.add_argument(
+        "--instrument", type=Path, default=os.environ.get(INSTRUMENT_VARIABLE) or None, metavar="DIR",
+        help="Write per-function call counts and timings for each day to a directory",
+    )
+    parser.add_argument(
+        "--trace-memory", action="store_true", default=bool(os.environ.get(TRACE_MEMORY_VARIABLE)),
+        help="Add tracemalloc allocation figures to the instrumentation reports",
+    )
+    parser.add_argument(
+        "--profile", action="store_true", default=bool(os.environ.get(PROFILE_VARIABLE)),
+        help="Add a cProfile dump to the instrumentation reports",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results and peak RSS as JSON")
+    args = parser.parse_args(argv)
+
+    days = parse_days(args.days) if args.days else available_days()
+    if args.input is not None and len(days) != 1:
+        parser.error("--input requires exactly one day")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    options = {"workers": args.workers, "backend": args.backend}
+    cache = ParseCache(args.cache, args.cache_limit << 20) if args.cache is not None else None
+    if args.instrument is None and (args.trace_memory or args.profile):
+        parser.error("--trace-memory and --profile need --instrument")
+    instrumentation = None
+    if args.instrument is not None:
+        instrumentation = Instrumentation(args.instrument, args.trace_memory, args.profile)
+
+    def run(day: int) -> DayResult:
+        if instrumentation is None:
+            return run_day(day, args.input, options, cache)
+        return instrumentation.measure(day, load_day(day), lambda: run_day(day, args.input, options, cache))
+
+    if args.json:
+        results = [asdict(run(day)) for day in days]
+        json.dump({"results": results, "peak_rss": peak_rss()}, sys.stdout, default=str)
+        print()
+        return 0
+
+    total = 0.0
+    for day in days:
+        result = run(day)
+        total += result.total_time
+        print(f"Day {day:02d}  Part 1: {result.part1}  Part 2: {result.part2}")
+        print(
+            f"        parse {format_duration(result.parse_time)}"
+            + (f"  solve {format_duration(result.solve_time)}" if result.solve_time is not None else "")
+            + f"  part 1 {format_duration(result.part1_time)}"
+            f"  part 2 {format_duration(result.part2_time)}"
+        )
+
+    if len(days) > 1:
+        print(f"Total: {format_duration(total)}")
+
+    return 0
@@ -8,6 +8,8 @@ int compareLong(const void * a, const void * b);
 long *resize_list(long *list, size_t *cur_size);
 void sort_list(long *num_list, size_t list_len);
 long number_freq(const long num, const long *num_list, const size_t list_len);
+long total_distance(const long *left_list, const long *right_list, size_t list_len);
+long similarity(const long *left_list, const long *right_list, size_t list_len);
 
 /**
  * @brief Long integer sort helper function for qsort()
@@ -42,6 +44,7 @@ long *resize_list(long *list, size_t *cur_size) {
  * @param list_len Size of number list
  */
 void sort_list(long *num_list, const size_t list_len) {
+    qsort(num_list, list_len, sizeof(long), compareLong);
 }
 
 /**
@@ -63,6 +66,51 @@ long number_freq(const long num, const long *num_list, const size_t list_len) {
     return total;
 }
 
+/**
+ * @brief Sum the distances between two sorted lists of numbers
+ * @param left_list Sorted left list of numbers
+ * @param right_list Sorted right list of numbers
+ * @param list_len Size of each number list
+ * @return Total distance between the lists
+ */
+long total_distance(const long *left_list, const long *right_list, const size_t list_len) {
+    long distance = 0;
+
+    for (size_t i = 0; i < list_len; i++) {
+        distance += labs(left_list[i] - right_list[i]);
+    }
+
+    return distance;
+}
+
+/**
+ * @brief Sum each left number multiplied by its frequency in the right list
+ * @param left_list Sorted left list of numbers
+ * @param right_list Sorted right list of numbers
+ * @param list_len Size of each number list
+ * @return Similarity score of the lists
+ */
+long similarity(const long *left_list, const long *right_list, const size_t list_len) {
+    long frequency = 0;
+    size_t start = 0;
+
+    for (size_t i = 0; i < list_len; i++) {
+        // Both lists are sorted, so the run of right numbers equal to this one starts at or after the last run
+        while (start < list_len && right_list[start] < left_list[i]) {
+            start++;
+        }
+        size_t end = start;
+        while (end < list_len && right_list[end] == left_list[i]) {
+            end++;
+        }
+        frequency += left_list[i] * number_freq(left_list[i], right_list + start, end - start);
+    }
+
+    return frequency;
+}
+
+// The shared library built for the Python runner only needs the solver functions
+#ifndef AOC_LIBRARY
 int main(int argc, char **argv) {
     long *left_list = malloc(sizeof(long) * 100);
     long *right_list = malloc(sizeof(long) * 100);
@@ -128,3 +176,4 @@ int main(int argc, char **argv) {
     free(right_list);
     return 0;
 }
+#endif
@@ -1,21 +1,103 @@
 #!/usr/bin/env python
 
+from array import array
+from collections import Counter
+from pathlib import Path
 
-input_file = open("input", "r")
-data=input_file.readlines()
-input_file.close()
+from aoc import cbackend
+from aoc.backends import C, NUMPY, PYTHON, check_backend
+from aoc.parsing import int_values, map_input
 
-left = []
-right = []
-for l, r in [line.split() for line in data]:
-    # There's an easier way to do this, I just can't think of it.
-    left.append(int(l))
-    right.append(int(r))
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-left.sort()
-right.sort()
+# Bump whenever parse() changes what it returns, so cached parses are rebuilt
+PARSER_VERSION = 1
 
-dist = sum(map(lambda l, r: abs(l-r), left, right))
-sim = sum(map(lambda l: l * right.count(l), left))
-print(f"Difference: {dist}")
-print(f"Similarity: {sim}")
+
+def parse(text: str | bytes, backend: str = PYTHON) -> tuple:
+    """
+    Split the location ID pairs into left and right lists.
+
+    Every ID is extracted in one pass by the shared integer parser, and the pairs are split by taking
+    alternate values. The numpy backend sorts both columns in place, which every later step can rely on. The C
+    backend sorts arrays of C longs in place with the C solver's sort_list().
+
+    :param text: Puzzle input
+    :param backend: Implementation to use, python, numpy or c
+    :return: Tuple of the left and right location ID lists
+    """
+    backend = check_backend(backend)
+    values = int_values(text)
+    if backend == NUMPY:
+        columns = np.frombuffer(values, dtype=np.int64).reshape(-1, 2).T.copy()
+        columns.sort(axis=1)
+        return columns[0], columns[1]
+    if backend == C:
+        values = cbackend.long_array(values)
+        left, right = values[0::2], values[1::2]
+        for column in (left, right):
+            cbackend.library(1).sort_list(cbackend.longs(column), len(column))
+        return left, right
+
+    return values[0::2].tolist(), values[1::2].tolist()
+
+
+def load(path: Path, backend: str = PYTHON) -> tuple:
+    return parse(map_input(path), backend)
+
+
+def encode(lists: tuple, backend: str = PYTHON) -> dict:
+    if backend in (NUMPY, C):
+        return {"left": lists[0], "right": lists[1]}
+
+    return {"left": array("q", lists[0]), "right": array("q", lists[1])}
+
+
+def decode(fields: dict, backend: str = PYTHON) -> tuple:
+    if backend == NUMPY:
+        # Read-only views straight onto the cache entry
+        return np.asarray(fields["left"]), np.asarray(fields["right"])
+    if backend == C:
+        return cbackend.long_array(fields["left"]), cbackend.long_array(fields["right"])
+
+    return fields["left"].tolist(), fields["right"].tolist()
+
+
+def part1(lists: tuple) -> int:
+    """
+    Sum the distances between the sorted left and right lists.
+    :param lists: Left and right location ID lists
+    :return: Total distance
+    """
+    if np is not None and isinstance(lists[0], np.ndarray):
+        left, right = lists
+        return int(np.abs(left - right).sum())
+    if isinstance(lists[0], array):
+        left, right = lists
+        return cbackend.library(1).total_distance(cbackend.longs(left), cbackend.longs(right), len(left))
+
+    left, right = sorted(lists[0]), sorted(lists[1])
+    return sum(map(lambda l, r: abs(l-r), left, right))
+
+
+def part2(lists: tuple) -> int:
+    """
+    Sum each left value multiplied by the number of times it appears in the right list.
+    :param lists: Left and right location ID lists
+    :return: Similarity score
+    """
+    if np is not None and isinstance(lists[0], np.ndarray):
+        # The right list is sorted, so each left value's count is the width of its run in the right list
+        left, right = lists
+        counts = np.searchsorted(right, left, side="right") - np.searchsorted(right, left, side="left")
+        return int((left * counts).sum())
+    if isinstance(lists[0], array):
+        left, right = lists
+        return cbackend.library(1).similarity(cbackend.longs(left), cbackend.longs(right), len(left))
+
+    left, right = lists
+    counts = Counter(right)
+    return sum(l * counts[l] for l in left)
@@ -22,6 +22,7 @@ bool all_positive(const long *changes, size_t changes_array_len);
 bool all_negative(const long *changes, size_t changes_array_len);
 bool safe(const long *changes, size_t changes_array_len);
 bool dampened_safe(const long* levels, size_t levels_len);
+long count_safe(const long *levels, const long *lengths, size_t reports, bool dampened);
 
 
 /**
@@ -143,6 +144,34 @@ long *levels_change(const long *levels, const size_t num, long *changes) {
     return changes;
 }
 
+/**
+ * @brief Count the safe reports in a batch of reports stored one after another.
+ * @param levels Array of every report's levels values, back to back.
+ * @param lengths Array of the number of levels in each report.
+ * @param reports Number of reports in the batch.
+ * @param dampened Also count the reports the problem dampener makes safe.
+ * @return Number of safe reports.
+ */
+long count_safe(const long *levels, const long *lengths, const size_t reports, const bool dampened) {
+    long safe_count = 0;
+
+    for (size_t report = 0; report < reports; report++) {
+        const size_t num = lengths[report];
+        long changes[num > 1 ? num - 1 : 1];
+
+        levels_change(levels, num, changes);
+        if (safe(changes, num > 0 ? num - 1 : 0) || (dampened && dampened_safe(levels, num))) {
+            safe_count++;
+        }
+
+        levels += num;
+    }
+
+    return safe_count;
+}
+
+// The shared library built for the Python runner only needs the solver functions
+#ifndef AOC_LIBRARY
 int main(int argc, char **argv) {
     char * line = nullptr;
     size_t line_len;
@@ -179,3 +208,4 @@ int main(int argc, char **argv) {
 
     fclose(input_file);
 }
+#endif
@@ -1,30 +1,154 @@
 #!/usr/bin/env python3
 
-import itertools
+from array import array
+from pathlib import Path
+
+from aoc import cbackend
+from aoc.backends import C, NUMPY, PYTHON, check_backend
+from aoc.cache import join_rows, split_rows
+from aoc.parsing import int_rows, map_input
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PARSER_VERSION = 1
+
+
+def first_fault(report: list, direction: int, skip: int = -1) -> int:
+    """
+    Find the first pair of adjacent levels that changes in the wrong direction or by the wrong amount.
+    :param report: Levels values
+    :param direction: 1 for increasing levels, -1 for decreasing levels
+    :param skip: Index of a level to leave out of the report
+    :return: Index of the first level in the faulty pair, or -1 if every change is safe
+    """
+    previous = -1
+    for i, level in enumerate(report):
+        if i == skip:
+            continue
+        # Check levels values are between 1 and 3 difference from their adjacent levels value, in the same direction
+        if previous >= 0 and not 1 <= (level - report[previous]) * direction <= 3:
+            return previous
+        previous = i
+
+    return -1
 
 
 def safe(report: list):
-    # Calculate the differences between adjacent levels values
-    # Check all levels values differences are positive or all levels values are negative
-    # Check levels values are between 1 and 3 difference from their adjacent levels value
-    level_change = [b - a for a, b in itertools.pairwise(report)]
-    return (
-            (all([l > 0 for l in level_change]) or all([l < 0 for l in level_change]))
-            and
-            (all([1 <= abs(l) <= 3 for l in level_change]))
-    )
+    # Check the levels are safe as all increasing or all decreasing
+    return first_fault(report, 1) < 0 or first_fault(report, -1) < 0
+
 
 def dampened_safe(report: list):
-    # If the report is safe in the strict regime, short circuit and return immediately
-    if safe(report): return True
+    for direction in (1, -1):
+        fault = first_fault(report, direction)
+        # If the report is safe in the strict regime, short circuit and return immediately
+        if fault < 0:
+            return True
+
+        # Every level before the fault is fine, and removing any of them leaves the faulty pair in place,
+        # so only removing one of the pair can make the report safe
+        if first_fault(report, direction, fault) < 0 or first_fault(report, direction, fault + 1) < 0:
+            return True
+
+    return False
+
+
+def strict_safe_batch(levels, lengths):
+    """
+    Check every report's safety at once.
+    :param levels: Reports as rows of a 2-D array, padded after each report's last level
+    :param lengths: Number of levels in each report
+    :return: Boolean array of each report's safety
+    """
+    changes = np.diff(levels, axis=1)
+    # Padding changes are outside the report and count as safe in either direction
+    padding = np.arange(changes.shape[1]) >= (lengths - 1)[:, None]
+    increasing = ((changes >= 1) & (changes <= 3)) | padding
+    decreasing = ((changes <= -1) & (changes >= -3)) | padding
+
+    return increasing.all(axis=1) | decreasing.all(axis=1)
+
+
+def dampened_safe_batch(levels, lengths):
+    """
+    Check every report's safety at once, allowing one level to be removed.
+    :param levels: Reports as rows of a 2-D array, padded after each report's last level
+    :param lengths: Number of levels in each report
+    :return: Boolean array of each report's dampened safety
+    """
+    result = strict_safe_batch(levels, lengths)
+    for column in range(levels.shape[1]):
+        # Removing a padding column leaves the report as it is
+        remaining = lengths - (column < lengths)
+        result |= strict_safe_batch(np.delete(levels, column, axis=1), remaining)
+
+    return result
+
+
+def count_safe(reports: tuple, dampened: bool) -> int:
+    """
+    Count safe reports with the C solver.
+    :param reports: Levels of every report back to back and the number of levels in each, as arrays of C longs
+    :param dampened: Also count the reports the problem dampener makes safe
+    :return: Number of safe reports
+    """
+    levels, lengths = reports
+    return cbackend.library(2).count_safe(cbackend.longs(levels), cbackend.longs(lengths), len(lengths), dampened)
+
+
+def parse(text: str | bytes, backend: str = PYTHON):
+    backend = check_backend(backend)
+    reports = int_rows(text)
+    if backend == C:
+        return cbackend.long_array(reports.values), cbackend.long_array(reports.lengths())
+    if backend == NUMPY:
+        # Spread the levels into rows padded to the longest report
+        lengths = np.asarray(reports.lengths())
+        levels = np.zeros((len(lengths), lengths.max(initial=0)), dtype=np.int64)
+        levels[np.arange(levels.shape[1]) < lengths[:, None]] = reports.array()
+        return levels, lengths
+
+    return reports.tolist()
+
+
+def load(path: Path, backend: str = PYTHON):
+    return parse(map_input(path), backend)
+
+
+def encode(reports, backend: str = PYTHON) -> dict:
+    if backend in (NUMPY, C):
+        levels, lengths = reports
+        return {"levels": levels, "lengths": lengths}
+
+    levels, lengths = join_rows(reports)
+    return {"levels": levels, "lengths": lengths}
+
+
+def decode(fields: dict, backend: str = PYTHON):
+    if backend == NUMPY:
+        return np.asarray(fields["levels"]), np.asarray(fields["lengths"])
+    if backend == C:
+        return cbackend.long_array(fields["levels"]), cbackend.long_array(fields["lengths"])
+
+    return split_rows(fields["levels"], fields["lengths"])
+
+
+def part1(reports) -> int:
+    if isinstance(reports, tuple) and isinstance(reports[0], array):
+        return count_safe(reports, False)
+    if np is not None and isinstance(reports, tuple):
+        return int(strict_safe_batch(*reports).sum())
 
-    # Otherwise, check if any combination of levels is safe after removing a single levels value
-    return any([safe(levels) for levels in itertools.combinations(report, len(report) - 1)])
+    return sum([safe(report) for report in reports])
 
 
-reports = [[int(y) for y in x.split()] for x in open("input", "r").readlines()]
-safe_reports = sum([safe(report) for report in reports])
-print(f"Safe reports: {safe_reports}")
+def part2(reports) -> int:
+    if isinstance(reports, tuple) and isinstance(reports[0], array):
+        return count_safe(reports, True)
+    if np is not None and isinstance(reports, tuple):
+        return int(dampened_safe_batch(*reports).sum())
 
-dampened_reports = sum([dampened_safe(report) for report in reports])
-print(f"Dampened safe reports: {dampened_reports}")
+    return sum([dampened_safe(report) for report in reports])
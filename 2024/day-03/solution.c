@@ -158,6 +158,8 @@ void recover_instructions(const char *input, size_t len) {
     }
 }
 
+// The shared library built for the Python runner only needs the solver functions
+#ifndef AOC_LIBRARY
 int main(int argc, char **argv) {
     FILE *input_file = fopen("input", "r");
     if (input_file == NULL) {
@@ -191,3 +193,4 @@ int main(int argc, char **argv) {
     long part2 = parse_instructions(data_buf);
     printf("Part 2 Sum: %ld\n", part2);
 }
+#endif
@@ -1,47 +1,266 @@
 #!/usr/bin/env python3
 
+import ctypes
+import functools
+import mmap
+import operator
+import os
 import re
-from operator import mul
+from pathlib import Path
+from typing import Iterable
+
+from aoc import cbackend
+from aoc.backends import C, PYTHON, check_backend
+from aoc.parallel import process_pool
 
 TEST="xmul(2,4)%&mul[3,7]!@^do_not_mul(5,5)+mul(32,64]then(mul(11,8)mul(8,5))"
-instruction_re = re.compile(r'mul\(([0-9]{1,3}),([0-9]{1,3})\)', flags=re.MULTILINE)
+TEST_ENABLED="xmul(2,4)&mul[3,7]!^don't()_mul(5,5)+mul(32,64](mul(11,8)undo()?mul(8,5))"
+instruction_re = re.compile(rb"mul\(([0-9]{1,3}),([0-9]{1,3})\)|do\(\)|don't\(\)")
+
+# Longest instruction is mul(999,999)
+MAX_INSTRUCTION_LEN = len(b"mul(999,999)")
+CHUNK_SIZE = 1 << 20
+# Byte ranges to split the input into for each worker process, so uneven ranges still balance out
+RANGES_PER_WORKER = 4
+
+
+class Scanner:
+    """
+    Single pass instruction scanner, fed the input a chunk at a time.
+
+    Multiplications are summed twice, once unconditionally and once only while enabled. "don't()" disables
+    the running instructions and "do()" enables them again. The tail of each chunk that could hold the start
+    of an instruction is held back and scanned with the next chunk, so instructions split across chunks are
+    still found and memory use stays constant.
+    """
+
+    __slots__ = ("total", "enabled_total", "enabled", "carry")
+
+    def __init__(self, enabled: bool = True):
+        self.total = 0
+        self.enabled_total = 0
+        self.enabled = enabled
+        self.carry = b""
+
+    def scan(self, buffer: bytes, limit: int) -> int:
+        """
+        Process the instructions in a buffer that start before the limit.
+        :param buffer: Instruction input
+        :param limit: Position where instructions may be incomplete
+        :return: Position just after the last processed instruction
+        """
+        position = 0
+        for instruction in instruction_re.finditer(buffer):
+            if instruction.start() >= limit:
+                break
+
+            left, right = instruction.groups()
+            if left is not None:
+                product = int(left) * int(right)
+                self.total += product
+                if self.enabled:
+                    self.enabled_total += product
+            else:
+                # "do()" is four characters, "don't()" is seven
+                self.enabled = instruction.end() - instruction.start() == 4
+            position = instruction.end()
+
+        return position
+
+    def feed(self, chunk: bytes):
+        """
+        Scan the next chunk of input.
+        :param chunk: Instruction input following the previous chunk
+        """
+        buffer = self.carry + chunk
+        limit = len(buffer) - (MAX_INSTRUCTION_LEN - 1)
+        position = self.scan(buffer, limit)
+        self.carry = buffer[max(limit, position, 0):]
 
+    def finish(self) -> tuple[int, int]:
+        """
+        Scan whatever input was held back, once there is no more input.
+        :return: Tuple of the sum of every product and the sum of the enabled products
+        """
+        self.scan(self.carry, len(self.carry))
+        self.carry = b""
+        return self.total, self.enabled_total
 
-def parse_instructions(instructions: str) -> int:
+
+def parse_instructions(instructions: Iterable[bytes] | str) -> tuple[int, int]:
     """
     Parse valid multiplication commands from the input data, and sum their products.
-    :param instructions: Textual instruction input
-    :return: Sum of instruction products
+    :param instructions: Textual instruction input, or an iterable of input chunks
+    :return: Tuple of the sum of every product and the sum of the products enabled by "do()" and "don't()"
     """
-    instructions = instruction_re.findall(instructions)
+    if isinstance(instructions, str):
+        instructions = [instructions.encode()]
+
+    scanner = Scanner()
+    for chunk in instructions:
+        scanner.feed(chunk)
+
+    return scanner.finish()
+
+
+class Summary:
+    """
+    Sums of the products in one byte range of the input, for either state the range can be entered in.
+
+    Only the instructions before a range's first "do()" or "don't()" depend on the state it's entered in,
+    so one pass over the range covers both. Adding the summaries of consecutive ranges gives the summary of
+    the whole span; addition is associative, so ranges can be scanned separately and combined in order.
+    """
+
+    __slots__ = ("total", "enabled_totals", "exits")
+
+    def __init__(self, total: int = 0, enabled_totals: tuple[int, int] = (0, 0), exits: tuple[bool, bool] = (False, True)):
+        self.total = total
+        # Sum of the enabled products, and whether instructions are enabled at the end of the range, when
+        # the range is entered disabled and enabled respectively
+        self.enabled_totals = enabled_totals
+        self.exits = exits
+
+    def __add__(self, other: "Summary") -> "Summary":
+        return Summary(
+            self.total + other.total,
+            tuple(totals + other.enabled_totals[exit] for totals, exit in zip(self.enabled_totals, self.exits)),
+            tuple(other.exits[exit] for exit in self.exits),
+        )
+
+    def sums(self) -> tuple[int, int]:
+        """
+        Get the sums for a summary of the whole input, which starts enabled.
+        :return: Tuple of the sum of every product and the sum of the enabled products
+        """
+        return self.total, self.enabled_totals[True]
+
+
+def summarize(data, start: int, end: int) -> Summary:
+    """
+    Sum the products of the instructions starting in a byte range of the input.
+
+    The scan carries on past the end of the range just far enough to finish an instruction that starts
+    inside it. Instructions can't overlap, so every range finds exactly the instructions a single pass over
+    the whole input would find starting there.
+    :param data: Instruction input, such as a memory map of the input file
+    :param start: Position the range starts at
+    :param end: Position just after the range
+    :return: Summary of the range
+    """
+    total = 0
+    # Products before the first "do()" or "don't()" count only when the range is entered enabled
+    entered_enabled = 0
+    enabled_total = 0
+    enabled = None
+    for instruction in instruction_re.finditer(data, start, min(end + MAX_INSTRUCTION_LEN - 1, len(data))):
+        if instruction.start() >= end:
+            break
+
+        left, right = instruction.groups()
+        if left is not None:
+            product = int(left) * int(right)
+            total += product
+            if enabled is None:
+                entered_enabled += product
+            elif enabled:
+                enabled_total += product
+        else:
+            # "do()" is four characters, "don't()" is seven
+            enabled = instruction.end() - instruction.start() == 4
+
+    if enabled is None:
+        return Summary(total, (0, entered_enabled), (False, True))
+    return Summary(total, (enabled_total, entered_enabled + enabled_total), (enabled, enabled))
+
+
+def summarize_range(path: Path, start: int, end: int) -> Summary:
+    """
+    Summarise a byte range of an input file, in a worker process.
+    :param path: Input file
+    :param start: Position the range starts at
+    :param end: Position just after the range
+    :return: Summary of the range
+    """
+    with open(path, "rb") as input_file, mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return summarize(data, start, end)
+
+
+def parallel_sums(path: Path, workers: int) -> tuple[int, int]:
+    """
+    Scan byte ranges of an input file in parallel and combine their summaries.
+    :param path: Input file
+    :param workers: Number of worker processes
+    :return: Tuple of the sum of every product and the sum of the enabled products
+    """
+    size = path.stat().st_size
+    if size == 0:
+        return 0, 0
+
+    # Workers map the file themselves, so only the range bounds and the summaries cross between processes
+    step = -(-size // (workers * RANGES_PER_WORKER))
+    starts = range(0, size, step)
+    ends = [min(start + step, size) for start in starts]
+    with process_pool(workers) as pool:
+        summaries = pool.map(summarize_range, [path] * len(starts), starts, ends)
+        return functools.reduce(operator.add, summaries, Summary()).sums()
+
+
+def read_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterable[bytes]:
+    """
+    Read a file through a memory map, a chunk at a time.
+    :param path: File to read
+    :param chunk_size: Number of bytes in each chunk
+    :return: Generator of file chunks
+    """
+    with open(path, "rb") as input_file:
+        if input_file.seek(0, 2) == 0:
+            return
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for start in range(0, len(data), chunk_size):
+                yield data[start:start + chunk_size]
+
+
+def c_sums(data: bytearray) -> tuple[int, int]:
+    """
+    Sum the products with the C solver, which removes the disabled instructions in place for part 2.
+    :param data: Instruction input followed by a null byte
+    :return: Tuple of the sum of every product and the sum of the enabled products
+    """
+    lib = cbackend.library(3)
+    buffer = (ctypes.c_char * len(data)).from_buffer(data)
+    total = lib.parse_instructions(buffer)
+    lib.recover_instructions(buffer, len(data))
+
+    return total, lib.parse_instructions(buffer)
+
 
-    return sum([mul(int(instruction[0]), int(instruction[1])) for instruction in instructions])
+def load(path: Path, backend: str = PYTHON, workers: int = 1) -> tuple[int, int]:
+    if check_backend(backend) == C:
+        # Read straight into a buffer with room for the null terminator the C solver expects
+        with open(path, "rb") as input_file:
+            size = os.fstat(input_file.fileno()).st_size
+            data = bytearray(size + 1)
+            input_file.readinto(memoryview(data)[:size])
+        return c_sums(data)
 
+    if workers > 1:
+        return parallel_sums(path, workers)
 
-with open("input", "r") as input_file:
-    data = input_file.read()
+    # Both parts come out of the same streaming pass over the input
+    return parse_instructions(read_chunks(path))
 
-# Execute the instructions
-part1 = parse_instructions(data)
 
-# Remove instruction segments between "don't()" and "do()"
-while True:
-    begin = data.find("don't()")
-    if begin < 0:
-        # There are no stop commands, so everything remaining needs to be multiplied.
-        break
+def parse(text: str, backend: str = PYTHON) -> tuple[int, int]:
+    if check_backend(backend) == C:
+        return c_sums(bytearray(text.encode() + b"\0"))
 
-    end = data.find("do()", begin)
-    if end < 0:
-        # There is no resuming command, so no other instructions matter.
-        data = data[:begin]
-        break
+    return parse_instructions(text)
 
-    data = data[:begin] + data[end + 4:]
 
+def part1(sums: tuple[int, int]) -> int:
+    return sums[0]
 
-# Execute the remaining instructions
-part2 = parse_instructions(data)
 
-print(f"Part 1 Sum: {part1}")
-print(f"Part 2 Sum: {part2}")
+def part2(sums: tuple[int, int]) -> int:
+    return sums[1]
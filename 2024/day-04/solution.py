@@ -1,8 +1,20 @@
 #!/usr/bin/env python3
 
+from collections import deque
+
+from aoc.backends import NUMPY, PYTHON, check_backend
+from aoc.grid import Grid
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 MATCH_STRING = "XMAS"
 MATCH_LENGTH = len(MATCH_STRING)
 
+PARSER_VERSION = 1
+
 ORDINALS = [-1, 0, 1]
 
 TEST_STRING = """MMMSXXMASM
@@ -19,119 +31,213 @@ MXMXAXMASX"""
 TEST_MATCHES = 18
 
 
-def match_word(grid, rows, cols, match, idx, x_pos, y_pos, x_dir, y_dir) -> bool:
+def find_xmas(grid: Grid) -> int:
     """
-    Recursively search the grid in the direction specified for the specified value
-    :param grid: two-dimensional array to search
-    :param rows: Number of rows remaining to search
-    :param cols: Number of columns remaining to search
-    :param match: string value to search for
-    :param idx: Current character of match to search for
-    :param x_pos: Row position to search for the idx'th character of the search string
-    :param y_pos: Column position to search for the idx'th character of the search string
-    :param x_dir: Row direction to search for the search string (-1, 0, 1)
-    :param y_dir: Column direction to search for the search string (-1, 0, 1)
-    :return: Boolean value of search success or failure
+    Find "MAS" forwards and backwards in an X pattern
+    :param grid: Padded grid, so every "A" has four diagonal neighbours to check
+    :return: Number of X patterns found in the grid
     """
+    cells = grid.cells
+    stride = grid.stride
+    ends = {tuple(b"MS"), tuple(b"SM")}
+    count = 0
 
-    # The search string index has reached the length of the search string
-    # We successfully found the entire search string
-    if idx == len(match):
-        return True
-
-    # If we are within the grid boundaries and we currently have a matching character,
-    # continue the search at the next (row, column) pair, in the current search direction
-    # for the next character in the search string
-    if 0 <= x_pos < rows and 0 <= y_pos < cols and match[idx] == grid[x_pos][y_pos]:
-        return match_word(grid, rows, cols, match, idx + 1, x_pos + x_dir, y_pos + y_dir, x_dir, y_dir)
+    for center in grid.find_all(ord("A")):
+        if (
+                (cells[center - stride - 1], cells[center + stride + 1]) in ends and
+                (cells[center - stride + 1], cells[center + stride - 1]) in ends
+        ): count += 1
 
-    # We don't have a matching character, and we haven't exhausted the search string
-    return False
+    return count
 
 
-def search(grid, match) -> int:
+class AhoCorasick:
     """
-    Iteratively call the match_word function for every search direction for every (row, column) in the grid
-    :param grid: two-dimensional array to search
-    :param match: string value to search for
-    :return: Number of instances of the search string found in the grid
-    """
-    count = 0
-    rows = len(grid)
-    cols = len(grid[0])
+    Aho-Corasick automaton matching many patterns in one pass over the text.
 
-    for row in range(rows):
-        for col in range(cols):
-            if grid[row][col] == match[0]:
-                for x_dir, y_dir in [(x,y) for x in ORDINALS for y in ORDINALS if (x,y) != (0,0)]:
-                    if match_word(grid, rows, cols, match, 0, row, col, x_dir, y_dir):
-                        count += 1
+    The trie's failure links are folded into a complete transition table, so each character of text costs
+    one lookup however many patterns there are. Characters that appear in no pattern return to the root.
+    """
 
-    return count
+    __slots__ = ("patterns", "transitions", "outputs")
+
+    def __init__(self, patterns: list[bytes]):
+        self.patterns = patterns
+        self.transitions = [{}]
+        self.outputs = [[]]
+
+        # Build the trie of patterns
+        for index, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                if char not in self.transitions[node]:
+                    self.transitions[node][char] = len(self.transitions)
+                    self.transitions.append({})
+                    self.outputs.append([])
+                node = self.transitions[node][char]
+            self.outputs[node].append(index)
+
+        # Breadth first, fill in every missing transition from the node's longest proper suffix in the trie
+        alphabet = set(b"".join(patterns))
+        fail = [0] * len(self.transitions)
+        queue = deque(self.transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            self.outputs[node] = self.outputs[node] + self.outputs[fail[node]]
+            for char in alphabet:
+                child = self.transitions[node].get(char)
+                if child is None:
+                    self.transitions[node][char] = self.transitions[fail[node]].get(char, 0)
+                else:
+                    fail[child] = self.transitions[fail[node]].get(char, 0)
+                    queue.append(child)
+
+    def matches(self, text: bytes):
+        """
+        Find every pattern occurrence in a text, overlapping matches included.
+        :param text: Text to search
+        :return: Generator of (pattern index, index of the match's last character) pairs
+        """
+        transitions = self.transitions
+        outputs = self.outputs
+        node = 0
+        for end, char in enumerate(text):
+            node = transitions[node].get(char, 0)
+            for index in outputs[node]:
+                yield index, end
+
+
+def grid_lines(grid: Grid):
+    """
+    Walk every row, column, diagonal and anti-diagonal of the grid.
+    :param grid: Padded grid to search
+    :return: Generator of (line text, start row, start column, row step, column step)
+    """
+    for x_dir, y_dir in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+        for line, start in grid.lines(grid.step(x_dir, y_dir)):
+            yield line, *grid.position(start), x_dir, y_dir
 
 
-def find_str(grid, match: str) -> int:
+def search_words(grid: Grid, words: list[str], positions: bool = False) -> dict:
     """
-    Find a string in a two-dimensional array of characters in any of the 8 possible directions.
-    The string may be forwards of backwards.
-    :param grid: two-dimensional array to search
-    :param match: string value to search for
+    Find several words in a grid at once, in any of the 8 possible directions.
+
+    Every word is added to one automaton forwards and backwards, then every line of the grid is streamed
+    through it once. The cost grows with the size of the grid and the number of matches, not the number
+    of words.
+    :param grid: Padded grid to search
+    :param words: string values to search for
+    :param positions: Report where each match is instead of how many there are
+    :return: Each word's match count, or list of (row, col, x_dir, y_dir) starts and directions
+    """
+    if not all(words):
+        raise ValueError("Search words must not be empty")
+
+    # Each pattern records the words it matches, and whether the word reads backward along the line
+    patterns = {}
+    for word in set(words):
+        patterns.setdefault(word.encode(), []).append((word, False))
+        patterns.setdefault(word[::-1].encode(), []).append((word, True))
+    automaton = AhoCorasick(list(patterns))
+    targets = [patterns[pattern] for pattern in automaton.patterns]
+
+    if not positions:
+        counts = [0] * len(targets)
+        for line, *_ in grid_lines(grid):
+            for index, _ in automaton.matches(line):
+                counts[index] += 1
+
+        found = {word: 0 for word in words}
+        for index, count in enumerate(counts):
+            for word, _ in targets[index]:
+                found[word] += count
+        return found
+
+    found = {word: [] for word in words}
+    for line, row, col, x_dir, y_dir in grid_lines(grid):
+        for index, end in automaton.matches(line):
+            for word, backward in targets[index]:
+                start = end - (len(word) - 1)
+                if backward:
+                    # The word starts at the far end of the match and reads against the line
+                    found[word].append((row + end * x_dir, col + end * y_dir, -x_dir, -y_dir))
+                else:
+                    found[word].append((row + start * x_dir, col + start * y_dir, x_dir, y_dir))
+
+    return found
+
+
+def count_word(grid, match: str) -> int:
+    """
+    Count a word in a grid of character codes in all 8 directions with whole-array comparisons.
+
+    For each direction, the grid is sliced once per letter, shifted so that every cell lines up with the
+    cell the letter would occupy in a word starting there. A start matches when all of its letters do.
+    :param grid: Two-dimensional uint8 array of character codes
+    :param match: String value to search for
     :return: Number of instances of the search string found in the grid
     """
+    rows, cols = grid.shape
+    span = len(match) - 1
+    codes = match.encode()
     count = 0
-    rows = len(grid)
-    cols = len(grid[0]) - 1
-    match_len = len(match)
-    bidi_match = [match, match[::-1]]
-
-    for row in range(rows):
-        for col in range(cols):
-            right, down, right_diag, left_diag = "", "", "", ""
-
-            for i in range(match_len):
-                if col+i < cols: right += grid[row][col+i]
-                if row+i < rows: down += grid[row+i][col]
-                if row+i < rows and col+i < cols: left_diag += grid[row+i][col+i]
-                if row + i < rows and (col+match_len) - (i+1) < cols: right_diag += grid[row+i][(col+match_len) - (i + 1)]
-
-            if right in bidi_match: count += 1
-            if down in bidi_match: count +=1
-            if left_diag in bidi_match: count += 1
-            if right_diag in bidi_match: count += 1
+
+    for x_dir, y_dir in [(x,y) for x in ORDINALS for y in ORDINALS if (x,y) != (0,0)]:
+        # Only starts that leave room for the whole word in this direction
+        first_row, last_row = max(0, -x_dir * span), rows - max(0, x_dir * span)
+        first_col, last_col = max(0, -y_dir * span), cols - max(0, y_dir * span)
+        if first_row >= last_row or first_col >= last_col:
+            continue
+
+        found = np.ones((last_row - first_row, last_col - first_col), dtype=bool)
+        for i, code in enumerate(codes):
+            found &= grid[
+                first_row + i * x_dir:last_row + i * x_dir,
+                first_col + i * y_dir:last_col + i * y_dir,
+            ] == code
+        count += int(found.sum())
 
     return count
 
 
-def find_xmas(grid) -> int:
+def count_xmas(grid) -> int:
     """
-    Find "XMAS" forwards and backwards in an X pattern
-    :param grid:
-    :return:
+    Find "MAS" forwards and backwards in an X pattern with whole-array comparisons
+    :param grid: Two-dimensional uint8 array of character codes
+    :return: Number of X patterns found in the grid
     """
-    count = 0
-    rows = len(grid)
-    cols = len(grid[0])
-
-    for row in range(rows - 2):
-        for col in range(cols - 2):
-            left_diagonal = grid[row][col] + grid[row+1][col+1] + grid[row+2][col+2]
-            right_diagonal = grid[row][col+2] + grid[row+1][col+1] + grid[row+2][col]
-            if (
-                    (left_diagonal == "MAS" or left_diagonal == "SAM") and
-                    (right_diagonal == "MAS" or right_diagonal == "SAM")
-            ): count += 1
+    m, a, s = b"MAS"
+    center = grid[1:-1, 1:-1] == a
+    top_left, bottom_right = grid[:-2, :-2], grid[2:, 2:]
+    top_right, bottom_left = grid[:-2, 2:], grid[2:, :-2]
+
+    left_diagonal = ((top_left == m) & (bottom_right == s)) | ((top_left == s) & (bottom_right == m))
+    right_diagonal = ((top_right == m) & (bottom_left == s)) | ((top_right == s) & (bottom_left == m))
+
+    return int((center & left_diagonal & right_diagonal).sum())
+
+
+def parse(text: str) -> Grid:
+    return Grid.parse(text)
+
+
+def encode(grid: Grid) -> dict:
+    return grid.fields()
+
+
+def decode(fields: dict) -> Grid:
+    return Grid.from_fields(fields)
 
-    return count
 
+def part1(grid: Grid, backend: str = PYTHON) -> int:
+    if check_backend(backend) == NUMPY:
+        return count_word(grid.array(), MATCH_STRING)
 
-with open("input", "r") as input_file:
-    data = input_file.readlines()
+    return search_words(grid, [MATCH_STRING])[MATCH_STRING]
 
-part1_recursive = search(data, MATCH_STRING)
-print(f"Part 1 recursive: {part1_recursive}")
 
-part1_forward = find_str(data, MATCH_STRING)
-print(f"Part 1 non-recursive: {part1_forward}")
+def part2(grid: Grid, backend: str = PYTHON) -> int:
+    if check_backend(backend) == NUMPY:
+        return count_xmas(grid.array())
 
-part2_count = find_xmas(data)
-print(f"Part 2: {part2_count}")
+    return find_xmas(grid)
@@ -1,6 +1,19 @@
 #!/usr/bin/env python3
 
+import itertools
+from array import array
+from collections import deque
 from _collections import defaultdict
+from pathlib import Path
+
+from aoc.backends import NUMPY, PYTHON, check_backend
+from aoc.cache import join_rows, split_rows
+from aoc.parsing import IntRows, int_rows, map_input
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 TEST_INPUT = """47|53
@@ -32,72 +45,372 @@ TEST_INPUT = """47|53
 61,13,29
 97,13,75,29,47"""
 
+PARSER_VERSION = 1
+
+# Largest range of page numbers to look up page bits in a table rather than by searching
+MAX_PAGE_TABLE = 1 << 24
+
+
+def iter_bits(mask: int):
+    """
+    Yield the positions of the set bits in a bitmap, lowest first.
+    :param mask: Bitmap
+    :return: Generator of bit positions
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class RuleGraph:
+    """
+    Page ordering rules as adjacency bitmaps, built once from the parsed instructions.
+
+    Every page is given a bit. Each page keeps a bitmap of the pages that must follow it and a bitmap of the
+    pages that must precede it, so checking a page against every other page of an update is one bitwise
+    operation instead of a loop.
+    """
+
+    __slots__ = ("bits", "pages", "successors", "predecessors")
 
-def valid(pages: list, instructions: dict) -> bool:
-    for i in range(len(pages)):
-        # Get an index into the current page as the instructions key.
-        for j in range(i + 1, len(pages)):
-            # Get the following page as a value in the instructions
-            if pages[j] not in instructions[pages[i]]:
-                # The next page in the update sequence doesn't match the instruction set
+    def __init__(self, instructions: dict, pages=()):
+        self.bits = {}
+        self.pages = []
+        self.successors = []
+        self.predecessors = []
+
+        for page in pages:
+            self.bit(page)
+
+        for page, following in instructions.items():
+            page_bit = self.bit(page)
+            for successor in following:
+                successor_bit = self.bit(successor)
+                self.successors[page_bit] |= 1 << successor_bit
+                self.predecessors[successor_bit] |= 1 << page_bit
+
+    def bit(self, page: int) -> int:
+        """
+        Get the bit position for a page, assigning the next free bit to new pages.
+        :param page: Page number
+        :return: Bit position
+        """
+        bit = self.bits.get(page)
+        if bit is None:
+            bit = self.bits[page] = len(self.pages)
+            self.pages.append(page)
+            self.successors.append(0)
+            self.predecessors.append(0)
+
+        return bit
+
+    def mask(self, pages: list) -> int:
+        """
+        Build a bitmap of a set of pages.
+        :param pages: Page numbers
+        :return: Bitmap with each page's bit set
+        """
+        mask = 0
+        for page in pages:
+            mask |= 1 << self.bit(page)
+
+        return mask
+
+    def valid(self, pages: list) -> bool:
+        """
+        Check that every page in an update has a rule placing it before each page that follows it.
+        :param pages: Update page order
+        :return: True if the pages are in order of the instructions
+        """
+        following = 0
+        for page in reversed(pages):
+            bit = self.bit(page)
+            # Every page after this one must be one of its successors
+            if following & ~self.successors[bit]:
                 return False
+            following |= 1 << bit
+
+        # All pages are in order of the instructions
+        return True
+
+    def repair(self, update: list) -> list:
+        """
+        Put an update's pages into an order that satisfies the rules between them.
+
+        Each page is ranked by how many of its predecessors are in the update. When the rules between the
+        update's pages form a total order the ranks are all distinct, and placing each page at its rank is the
+        order. Anything else falls back to Kahn's algorithm.
+        :param update: Update page order
+        :return: Repaired page order
+        """
+        members = self.mask(update)
+        ordered = [None] * len(update)
+
+        for page in update:
+            rank = (self.predecessors[self.bit(page)] & members).bit_count()
+            if rank >= len(ordered) or ordered[rank] is not None:
+                break
+            ordered[rank] = page
+        else:
+            if self.valid(ordered):
+                return ordered
+
+        return self.topological_sort(update)
+
+    def topological_sort(self, update: list) -> list:
+        """
+        Order an update's pages with Kahn's algorithm, using only the rules between pages in the update.
+        :param update: Update page order
+        :return: Page order satisfying the rules
+        """
+        members = self.mask(update)
+        in_degree = {page: (self.predecessors[self.bit(page)] & members).bit_count() for page in update}
+        ready = deque(page for page in update if in_degree[page] == 0)
+        ordered = []
+
+        while ready:
+            page = ready.popleft()
+            ordered.append(page)
+            for bit in iter_bits(self.successors[self.bit(page)] & members):
+                successor = self.pages[bit]
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    ready.append(successor)
+
+        if len(ordered) != len(in_degree):
+            raise ValueError(f"Rules for update {update} contain a cycle")
+
+        return ordered
+
+    def matrix(self):
+        """
+        Unpack the successor bitmaps into a dense precedence matrix.
+
+        :return: Square boolean numpy array, True at [a, b] when a rule puts page bit a before page bit b
+        """
+        count = len(self.pages)
+        width = (count + 7) // 8
+        data = b"".join(mask.to_bytes(width, "little") for mask in self.successors)
+        rows = np.frombuffer(data, dtype=np.uint8).reshape(count, width)
+        return np.unpackbits(rows, axis=1, count=count, bitorder="little").view(bool)
+
+
+def total_order_ranks(matrix):
+    """
+    Rank the pages by the rules, if the rules order every pair of pages one way round without contradiction.
+
+    :param matrix: Dense precedence matrix
+    :return: Each page bit's position in the order, or None if the rules aren't a strict total order
+    """
+    ranks = matrix.sum(axis=0)
+    if not np.array_equal(np.sort(ranks), np.arange(len(ranks))):
+        return None
+    if not np.array_equal(matrix, ranks[:, None] < ranks[None, :]):
+        return None
+
+    return ranks
+
+
+def in_order(matrix, packed):
+    """
+    Check every pair of pages in each update against the precedence matrix, one distance apart at a time.
 
-    # All pages are in order of the instructions
-    return True
+    :param matrix: Dense precedence matrix, including the padding page
+    :param packed: Updates as rows of page bits
+    :return: Boolean array, True for each update whose every page has a rule placing it before every later page
+    """
+    ordered = np.ones(len(packed), dtype=bool)
+    for gap in range(1, packed.shape[1]):
+        ordered &= matrix[packed[:, :-gap], packed[:, gap:]].all(axis=1)
 
+    return ordered
 
-def parse_input(s: list[str]) -> tuple:
+
+class UpdateBatch:
+    """
+    Every update packed into one array of page bits, checked against a dense precedence matrix with numpy.
+
+    Updates are padded after their last page with an extra page bit whose rules allow it anywhere, so the
+    padding never breaks a rule. When the rules are a strict total order over all pages, as when every pair
+    of pages has a rule, each page has a rank and checking or repairing an update comes down to comparing
+    ranks. Otherwise every pair of pages in each update is looked up in the matrix.
+    """
+
+    __slots__ = ("pages", "matrix", "ranks", "packed", "lengths")
+
+    def __init__(self, rules: RuleGraph, updates: list):
+        count = len(rules.pages)
+        self.pages = np.array(rules.pages + [0], dtype=np.int64)
+        self.matrix = np.ones((count + 1, count + 1), dtype=bool)
+        self.matrix[:count, :count] = rules.matrix()
+
+        self.ranks = total_order_ranks(self.matrix[:count, :count])
+        if self.ranks is not None:
+            # The padding ranks after every page
+            self.ranks = np.append(self.ranks, count)
+
+        self.lengths = np.fromiter(map(len, updates), dtype=np.int64, count=len(updates))
+        self.packed = np.full((len(updates), self.lengths.max(initial=0)), count, dtype=np.int64)
+        flat = np.fromiter(itertools.chain.from_iterable(updates), dtype=np.int64, count=self.lengths.sum())
+        self.packed[np.arange(self.packed.shape[1]) < self.lengths[:, None]] = self.bits(flat)
+
+    def bits(self, pages):
+        """
+        Look up the bits of many pages at once.
+
+        :param pages: Array of page numbers, all known to the rules
+        :return: Array of page bits
+        """
+        known = self.pages[:-1]
+        lowest = int(known.min(initial=0))
+        span = int(known.max(initial=0)) - lowest + 1
+        if span <= MAX_PAGE_TABLE:
+            table = np.zeros(span, dtype=np.int64)
+            table[known - lowest] = np.arange(len(known))
+            return table[pages - lowest]
+
+        order = np.argsort(known)
+        return order[np.searchsorted(known[order], pages)]
+
+    def validate(self) -> tuple:
+        """
+        Check which updates are already in order.
+
+        :return: Tuple of a boolean array marking the valid updates and the sum of their middle pages
+        """
+        if self.ranks is not None:
+            # Ranks must rise along each update, up to its last page
+            rising = np.diff(self.ranks[self.packed], axis=1) > 0
+            valid = (rising | (np.arange(1, self.packed.shape[1]) >= self.lengths[:, None])).all(axis=1)
+        else:
+            valid = in_order(self.matrix, self.packed)
+
+        rows = np.flatnonzero(valid)
+        middles = self.pages[self.packed[rows, self.lengths[rows] // 2]]
+        return valid, int(middles.sum())
+
+    def repaired_middle_sum(self, rules: RuleGraph, updates: list, valid) -> int:
+        """
+        Sum the middle pages of the invalid updates once they are put in order.
+
+        :param rules: Page ordering rules the batch was built from
+        :param updates: Updates the batch was built from
+        :param valid: Boolean array marking the valid updates, from ``validate()``
+        :return: Sum of the repaired middle pages
+        """
+        rows = np.flatnonzero(~valid)
+        packed, lengths = self.packed[rows], self.lengths[rows]
+        width = packed.shape[1]
+        if self.ranks is not None:
+            ordered = np.take_along_axis(packed, np.argsort(self.ranks[packed], axis=1), axis=1)
+            return int(self.pages[ordered[np.arange(len(rows)), lengths // 2]].sum())
+
+        # As in RuleGraph.repair(), rank each page by how many of its predecessors are in the update
+        present = np.arange(width) < lengths[:, None]
+        ranks = np.zeros(packed.shape, dtype=np.int64)
+        for column in range(width):
+            ranks += self.matrix[packed[:, column, None], packed] & present[:, column, None]
+        # Padding keeps its place after the pages
+        ranks = np.where(present, ranks, np.arange(width))
+
+        # Where the ranks are all different, placing each page at its rank should be the order
+        distinct = (np.sort(ranks, axis=1) == np.arange(width)).all(axis=1)
+        ordered = np.full_like(packed, len(self.pages) - 1)
+        np.put_along_axis(ordered, np.where(distinct[:, None], ranks, np.arange(width)), packed, axis=1)
+        repaired = distinct & in_order(self.matrix, ordered)
+
+        total = int(self.pages[ordered[repaired, lengths[repaired] // 2]].sum())
+        # Anything else goes through the same fallback as the Python backend
+        for row in rows[~repaired]:
+            update = rules.repair(updates[row])
+            total += update[len(update) // 2]
+
+        return total
+
+
+def parse_input(rows: IntRows) -> tuple:
     parse_instructions = True
     instructions = defaultdict(set)
     updates = []
 
-    for line in s:
-        line = line.strip()
-        if line == "":
+    for row in rows.tolist():
+        # The blank line between the sections has no pages
+        if not row:
             parse_instructions = False
             continue
 
         if parse_instructions:
-            x, y = map(int, line.split("|"))
+            x, y = row
             instructions[x].add(y)
             continue
-        updates.append(list(map(int, line.split(","))))
+        updates.append(row)
 
     return instructions, updates
 
 
-def repair_update(update: list, instructions: defaultdict[list]) -> list:
-    update_rules = defaultdict(set)
+def parse(text: str | bytes) -> tuple:
+    # instructions, updates = parse_input(int_rows(TEST_INPUT))
+    instructions, updates = parse_input(int_rows(text))
+    rules = RuleGraph(instructions, (page for update in updates for page in update))
+
+    return rules, updates
+
+
+def load(path: Path) -> tuple:
+    return parse(map_input(path))
+
+
+def encode(parsed: tuple) -> dict:
+    rules, updates = parsed
+    # Every page's bitmaps are stored at the same width, so they can be sliced back out by position
+    width = (len(rules.pages) + 7) // 8
+    pages, lengths = join_rows(updates)
 
-    # Build a rule set for the pages in this update
-    for page in update:
-        # Filter for the intersecting page from the rules
-        update_rules[page] = instructions[page] & set(update)
+    return {
+        "rule_pages": array("q", rules.pages),
+        "successors": b"".join(mask.to_bytes(width, "little") for mask in rules.successors),
+        "predecessors": b"".join(mask.to_bytes(width, "little") for mask in rules.predecessors),
+        "pages": pages,
+        "lengths": lengths,
+    }
 
-    # Sort the page order using the filtered rules
-    repaired_order = sorted(update_rules, key=lambda k: len(update_rules[k]), reverse=True)
 
-    return repaired_order
+def decode(fields: dict) -> tuple:
+    rules = RuleGraph({}, fields["rule_pages"].tolist())
+    width = (len(rules.pages) + 7) // 8
+    # Without any rules there are no pages, and the empty rule graph has no bitmaps to read back
+    if width:
+        for name in ("successors", "predecessors"):
+            data = fields[name]
+            setattr(rules, name, [int.from_bytes(data[i:i + width], "little") for i in range(0, len(data), width)])
 
+    return rules, split_rows(fields["pages"], fields["lengths"])
 
-def main():
-    with open("input", "r") as input_file:
-        data = input_file.readlines()
 
-    # instructions, updates, d = parse_input(TEST_INPUT.splitlines())
-    instructions, updates = parse_input(data)
+def part1(parsed: tuple, backend: str = PYTHON) -> int:
+    rules, updates = parsed
+    if check_backend(backend) == NUMPY:
+        return UpdateBatch(rules, updates).validate()[1]
 
     part1_sum = 0
-    part2_sum = 0
     for update in updates:
-        if valid(update, instructions):
+        if rules.valid(update):
             part1_sum += update[len(update)//2]
-        else:
-            repaired = repair_update(update, instructions)
-            part2_sum += repaired[len(repaired)//2]
 
-    print(f"Part 1: {part1_sum}")
-    print(f"Part 2: {part2_sum}")
+    return part1_sum
+
 
+def part2(parsed: tuple, backend: str = PYTHON) -> int:
+    rules, updates = parsed
+    if check_backend(backend) == NUMPY:
+        batch = UpdateBatch(rules, updates)
+        return batch.repaired_middle_sum(rules, updates, batch.validate()[0])
+
+    part2_sum = 0
+    for update in updates:
+        if not rules.valid(update):
+            repaired = rules.repair(update)
+            part2_sum += repaired[len(repaired)//2]
 
-main()
+    return part2_sum
@@ -1,5 +1,15 @@
 #!/usr/bin/env python3
-import copy
+import itertools
+from array import array
+
+from aoc.backends import NUMPY, PYTHON, check_backend
+from aoc.grid import PAD, Grid
+from aoc.parallel import chunked, process_pool
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Overview:
 # Move the guard through the grid until they reach an edge
@@ -22,6 +32,9 @@ TEST_POSITIONS = 41
 # Everything is in up, right, down, left order
 DIRECTIONS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
 AVATARS = ["^", ">", "v", "<"]
+OBSTACLE = ord("#")
+
+PARSER_VERSION = 1
 
 
 def avatar_to_direction(avatar: str) -> tuple[int,int]:
@@ -34,158 +47,333 @@ def avatar_to_direction(avatar: str) -> tuple[int,int]:
     return DIRECTIONS[AVATARS.index(avatar)]
 
 
-def direction_to_avatar(direction: tuple[int, int]) -> str:
-    """
-    Convert a direction value into a character describing the guard's direction.
-
-    :param direction: Tuple of row, column direction values
-    :return: Character depicting the direction the guard is facing
-    """
-    return AVATARS[DIRECTIONS.index(direction)]
-
-
-def find_avatar(grid: list) -> tuple[int, int]:
+def find_avatar(grid: Grid) -> int:
     """
     Find the guard's avatar in the grid's characters.
 
     :param grid: Layout of the map data
-    :return: Guard's row, col position in the map
-    """
-    for i in range(len(grid)):
-        for a in AVATARS:
-            try:
-                j = grid[i].index(a)
-                return i, j
-            except ValueError:
-                pass
-        # for j in range(len(grid[0])):
-        #     if grid[i][j] in AVATARS:
-        #         return i, j
-
-    # There is no avatar on the grid, this is an error
-    # By returning -1, -1 the guard will start outside the bounds of the grid
-    # which will result in an empty position list
-    return -1, -1
-
-
-def choose_direction(current: tuple[int, int]) -> tuple[int, int]:
-    """
-    Rotate the guard's direction clockwise.
-
-    :param current: The current direction value for the guard
-    :return: Tuple containing the next direction value for the guard
+    :return: Flat index of the guard's position in the map, or -1 if there is no guard
     """
-    return DIRECTIONS[(DIRECTIONS.index(current) + 1) % len(DIRECTIONS)]
+    return grid.find("".join(AVATARS).encode())
 
 
-def get_path(grid: list) -> set[tuple[int, int]]:
+def get_path(grid: Grid) -> set[int]:
     """
     Walk the specified grid, returning the traversed path when we reach the edge of the grid.
 
-    :param grid: A list of a list of characters representing the floor plan of the lab
-    :return: Set of row, column pairs traversed in the lab
+    :param grid: Padded floor plan of the lab
+    :return: Set of flat indices traversed in the lab
     """
-    cur_row, cur_col = find_avatar(grid)
-    guard = grid[cur_row][cur_col]
-    direction = avatar_to_direction(guard)
-    rows = len(grid)
-    cols = len(grid[0])
+    position = find_avatar(grid)
+    # There is no avatar on the grid, so there is no path
+    if position < 0:
+        return set()
+
+    cells = grid.cells
+    steps = [grid.step(*direction) for direction in DIRECTIONS]
+    heading = DIRECTIONS.index(avatar_to_direction(chr(cells[position])))
     positions = set()
 
-    while True:
-        # Shorthand variables to clarity
-        next_row = cur_row + direction[0]
-        next_col = cur_col + direction[1]
-        # guard = direction_to_avatar(direction)
-
-        # If we're outside the grid bounds, return the list of positions
-        if not (0 <= cur_row < rows and 0 <= cur_col < cols):
-            return positions
+    # Walking off the grid lands on the padding around it
+    while cells[position] != PAD:
+        next_position = position + steps[heading]
 
-        # Check the next space in the current direction for an in-bounds obstacle
-        if next_row < rows and next_col < cols and grid[next_row][next_col] == "#":
-            direction = choose_direction(direction)
+        # Check the next space in the current direction for an obstacle
+        if cells[next_position] == OBSTACLE:
+            heading = (heading + 1) % len(DIRECTIONS)
             continue
 
         # Add the current position to the visited positions
-        positions.add((cur_row, cur_col))
-        cur_row = next_row
-        cur_col = next_col
+        positions.add(position)
+        position = next_position
 
+    return positions
 
-def will_loop(grid: list[list[str]], obs_row, obs_col) -> bool:
-    """
-    Place an obstacle at the specified row, col position, then walk the grid checking for loops
 
-    :param grid: Lab floor plan to walk
-    :param obs_row: New obstacle row position
-    :param obs_col: New obstacle column position
-    :return: True if a loop is detected, otherwise false.
+def build_jumps(grid: Grid) -> list[array]:
     """
-    # Make a copy of the original grid to operate on
-    test_grid = copy.deepcopy(grid)
+    Index where the guard stops in front of the next obstacle, for every cell and heading.
 
-    cur_row, cur_col = find_avatar(test_grid)
-    direction = avatar_to_direction(test_grid[cur_row][cur_col])
-    rows = len(test_grid)
-    cols = len(test_grid[0])
+    Cells are numbered by their flat index in the padded grid. Moving off the edge of the grid is recorded
+    as the padding cell the guard steps onto.
 
-    # We can't modify the guard's position or they'll notice the paradox
-    if (obs_row, obs_col) == (cur_row, cur_col):
-        return False
+    :param grid: Padded floor plan of the lab
+    :return: One jump table per direction, in DIRECTIONS order
+    """
+    jumps = [array("i", [-1]) * len(grid) for _ in DIRECTIONS]
+
+    # Rows serve right and left, columns serve down and up
+    for step, forward, backward in ((grid.step(0, 1), 1, 3), (grid.step(1, 0), 2, 0)):
+        for line, index in grid.lines(step):
+            runs = line.split(b"#")
+            for number, run in enumerate(runs):
+                if run:
+                    first, last = index, index + (len(run) - 1) * step
+                    # Every cell of a run between obstacles stops at the same place, so fill the run at once
+                    cells = slice(first, last + 1, step)
+                    stop = last if number < len(runs) - 1 else last + step
+                    jumps[forward][cells] = array("i", [stop]) * len(run)
+                    stop = first if number > 0 else first - step
+                    jumps[backward][cells] = array("i", [stop]) * len(run)
+                index += (len(run) + 1) * step
+
+    return jumps
+
+
+class PatrolMap:
+    """
+    Jump table simulation of the guard's patrol.
+
+    The guard moves straight from one turning point to the next instead of one cell at a time. A candidate
+    obstacle is checked against each straight run rather than written into a copy of the grid, and the
+    turning points already visited are tracked in a bitset of (cell, heading) states.
 
-    # If the target already has an obstacle, modifying it won't cause a loop
-    if test_grid[obs_row][obs_col] == "#":
-        return False
+    The original route is walked once up front. A new obstacle can only change the route from the first
+    time the guard would walk into it, so each candidate is simulated from the guard's state just before that,
+    with the turning points of the route so far already marked as seen.
+    """
 
-    # Place the new obstacle in the lab floor plan.
-    test_grid[obs_row][obs_col] = "#"
+    __slots__ = ("cells", "steps", "start", "heading", "jumps", "seen", "turns")
+
+    def __init__(self, grid: Grid):
+        self.cells = grid.cells
+        self.steps = [grid.step(*direction) for direction in DIRECTIONS]
+        self.start = find_avatar(grid)
+        # Without a guard there is no heading, and no route to walk
+        self.heading = DIRECTIONS.index(avatar_to_direction(chr(grid[self.start]))) if self.start >= 0 else -1
+        self.jumps = build_jumps(grid)
+        self.seen = bytearray((len(grid) * len(DIRECTIONS) + 7) // 8)
+        # Turning point states of the original route, in the order the guard reaches them
+        self.turns = array("q")
+
+    def route(self) -> list[tuple[int, int, int, int]]:
+        """
+        Walk the original route, recording its turning points and where each cell is first reached.
+
+        :return: List of (cell, position, heading, turns) for every cell the guard walks into, in route
+            order, where the guard is at position facing heading just before first entering the cell,
+            having made the first turns turns of the route
+        """
+        if self.start < 0:
+            return []
+
+        cells = self.cells
+        steps = self.steps
+        jumps = self.jumps
+        turns = self.turns
+        del turns[:]
+        reached = {self.start}
+        candidates = []
+        position = self.start
+        heading = self.heading
+
+        while True:
+            step = steps[heading]
+            stop = jumps[heading][position]
+            # Only walk onto the padding to leave the grid
+            last = stop - step if cells[stop] == PAD else stop
+
+            for cell in range(position + step, last + step, step):
+                if cell not in reached:
+                    reached.add(cell)
+                    candidates.append((cell, cell - step, heading, len(turns)))
+
+            if cells[stop] == PAD:
+                return candidates
+
+            turns.append(stop * 4 + heading)
+            position = stop
+            heading = (heading + 1) % 4
+
+    def will_loop(self, obstacle: int, position: int | None = None, heading: int | None = None) -> bool:
+        """
+        Place an obstacle at the specified position, then walk the grid checking for loops
+
+        :param obstacle: Flat index of the new obstacle
+        :param position: Flat index to start walking from, defaults to the guard's starting cell
+        :param heading: Direction to start walking in, defaults to the guard's starting heading
+        :return: True if a loop is detected, otherwise false.
+        """
+        # We can't modify the guard's position or they'll notice the paradox
+        if obstacle == self.start:
+            return False
 
-    seen = set()
-    while True:
-        # Shorthand variables to clarity
-        next_row = cur_row + direction[0]
-        next_col = cur_col + direction[1]
+        cells = self.cells
+        steps = self.steps
+        jumps = self.jumps
+        seen = self.seen
+        touched = []
+        position = self.start if position is None else position
+        heading = self.heading if heading is None else heading
+
+        try:
+            while True:
+                step = steps[heading]
+                stop = jumps[heading][position]
+
+                # Steps along the heading to the new obstacle, if it is in line with us and ahead of us
+                ahead, offset = divmod(obstacle - position, step)
+                if offset == 0 and 0 < ahead <= (stop - position) // step:
+                    # The new obstacle is closer than the next existing one, stop in front of it instead
+                    stop = obstacle - step
+
+                # We've walked off the grid without finding a loop
+                if cells[stop] == PAD:
+                    return False
+
+                # If we've already turned here with the same heading, we're in a loop
+                state = stop * 4 + heading
+                mask = 1 << (state & 7)
+                if seen[state >> 3] & mask:
+                    return True
+                seen[state >> 3] |= mask
+                touched.append(state)
+
+                position = stop
+                heading = (heading + 1) % 4
+        finally:
+            # Clear only the bits this walk set, so the bitset can be reused for the next obstacle
+            for state in touched:
+                seen[state >> 3] &= ~(1 << (state & 7))
+
+    def count_loops(self, candidates: list[tuple[int, int, int, int]]) -> int:
+        """
+        Count the candidate obstacles that trap the guard in a loop, resuming each from where it diverges.
+
+        :param candidates: Consecutive entries of ``route()``
+        :return: Number of candidates that cause a loop
+        """
+        turns = self.turns
+        seen = self.seen
+        marked = 0
+        count = 0
+
+        try:
+            for obstacle, position, heading, prefix in candidates:
+                # Mark the route's turning points up to where this candidate diverges from it. Coming back
+                # to any of them replays the route up to here and so around again
+                for state in turns[marked:prefix]:
+                    seen[state >> 3] |= 1 << (state & 7)
+                marked = max(marked, prefix)
+
+                count += self.will_loop(obstacle, position, heading)
+        finally:
+            for state in turns[:marked]:
+                seen[state >> 3] &= ~(1 << (state & 7))
+
+        return count
+
+    def count_loops_lockstep(self, candidates: list[tuple[int, int, int, int]]) -> int:
+        """
+        Count the candidate obstacles that trap the guard in a loop, walking every candidate's guard together.
+
+        Each guard is a column of numpy state: position, heading and obstacle, plus what Brent's cycle
+        detection needs. Every iteration moves all the guards still walking to their next turning point with
+        a handful of array operations. Brent's method checks each guard's state against a saved state that
+        jumps ahead to the guard after 1, 2, 4, ... moves, so a guard going round a loop meets it again
+        without a visited set per guard. Guards that leave the grid or loop are dropped as they finish.
+
+        :param candidates: Entries of ``route()``
+        :return: Number of candidates that cause a loop
+        """
+        if not candidates:
+            return 0
+
+        cells = np.frombuffer(self.cells, dtype=np.uint8)
+        steps = np.array(self.steps, dtype=np.int64)
+        jumps = np.array([np.frombuffer(jump, dtype=np.int32) for jump in self.jumps], dtype=np.int64)
+
+        obstacle, position, heading, _ = np.array(candidates, dtype=np.int64).T
+        keep = obstacle != self.start
+        obstacle, position, heading = obstacle[keep], position[keep], heading[keep]
+        # Brent's saved state, the moves until it is next replaced, and the moves since it last was
+        saved_position, saved_heading = position.copy(), heading.copy()
+        power = np.ones_like(position)
+        moves = np.zeros_like(position)
+        count = 0
+
+        while len(position):
+            step = steps[heading]
+            stop = jumps[heading, position]
+
+            # Stop in front of the new obstacle instead when it's ahead of us and closer than the next one
+            ahead, offset = np.divmod(obstacle - position, step)
+            blocked = (offset == 0) & (ahead > 0) & (ahead <= (stop - position) // step)
+            stop = np.where(blocked, obstacle - step, stop)
+
+            position = stop
+            heading = (heading + 1) % 4
+            left = cells[stop] == PAD
+            looped = (position == saved_position) & (heading == saved_heading) & ~left
+            count += int(np.count_nonzero(looped))
+
+            moves += 1
+            replace = moves == power
+            saved_position[replace] = position[replace]
+            saved_heading[replace] = heading[replace]
+            power[replace] *= 2
+            moves[replace] = 0
+
+            walking = ~(left | looped)
+            if not walking.all():
+                position, heading, obstacle = position[walking], heading[walking], obstacle[walking]
+                saved_position, saved_heading = saved_position[walking], saved_heading[walking]
+                power, moves = power[walking], moves[walking]
+
+        return count
+
+
+# Patrol map handed to each worker process once, when the pool starts
+worker_patrol = None
+
+
+def init_worker(patrol: PatrolMap):
+    global worker_patrol
+    worker_patrol = patrol
+
+
+def count_loops(candidates: list[tuple[int, int, int, int]], backend: str = PYTHON) -> int:
+    """
+    Count the candidate obstacle positions that trap the guard in a loop, using the worker's patrol map.
 
-        # If we've already visited this location in the same direction, we're in a loop
-        if (cur_row, cur_col, direction) in seen:
-            return True
+    :param candidates: Consecutive entries of the patrol map's route
+    :param backend: numpy to walk the candidates in lockstep, any other backend checks them one by one
+    :return: Number of candidates that cause a loop
+    """
+    if backend == NUMPY:
+        return worker_patrol.count_loops_lockstep(candidates)
+    return worker_patrol.count_loops(candidates)
 
-        # Add the current location and heading to the visited set
-        seen.add((cur_row, cur_col, direction))
 
-        # If we're outside the grid bounds, we haven't found a loop
-        if not (0 <= next_row < rows and 0 <= next_col < cols):
-            return False
+def parse(text: str) -> Grid:
+    # text = TEST_INPUT
+    return Grid.parse(text)
 
-        # Check the next space in the current direction for an in-bounds obstacle
-        if test_grid[next_row][next_col] == "#":
-            direction = choose_direction(direction)
-            continue
 
-        # Move to the next location
-        cur_row = next_row
-        cur_col = next_col
+def encode(grid: Grid) -> dict:
+    return grid.fields()
 
 
-def main():
-    grid = []
+def decode(fields: dict) -> Grid:
+    return Grid.from_fields(fields)
 
-    # data = TEST_INPUT.splitlines()
-    with open("input", "r") as input_file:
-        data = input_file.readlines()
-    for line in data:
-        grid.append(list(line.strip()))
 
-    positions = get_path(grid)
+def part1(grid: Grid) -> int:
     # Part 1: 4939
-    print(f"Number of unique positions visited: {len(positions)}")
-
-    # Part 2: 1434
-    count = 0
-    for position in positions:
-        count += will_loop(grid, position[0], position[1])
-    print(f"Loops: {count}")
+    return len(get_path(grid))
 
 
-main()
+def part2(grid: Grid, workers: int = 1, backend: str = PYTHON) -> int:
+    # Part 2: 1434
+    backend = check_backend(backend)
+    patrol = PatrolMap(grid)
+    candidates = patrol.route()
+
+    if workers > 1:
+        # Every candidate is independent, so spread runs of consecutive candidates over the pool
+        with process_pool(workers, init_worker, (patrol,)) as pool:
+            return sum(pool.map(count_loops, chunked(candidates, workers), itertools.repeat(backend)))
+
+    if backend == NUMPY:
+        return patrol.count_loops_lockstep(candidates)
+    return patrol.count_loops(candidates)
@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
 
+import functools
+from pathlib import Path
+from typing import Callable
+
+from aoc.cache import join_rows, split_rows
+from aoc.parsing import int_rows, map_input, records
+from aoc.parallel import chunked, process_pool
+
 TEST_INPUT="""190: 10 19
 3267: 81 40 27
 83: 17 5
@@ -10,6 +18,8 @@ TEST_INPUT="""190: 10 19
 21037: 9 7 18 13
 292: 11 6 16 20"""
 
+PARSER_VERSION = 1
+
 
 def mul(a: int, b: int) -> int:
     """
@@ -31,6 +41,19 @@ def add(a: int, b: int) -> int:
     return a+b
 
 
+@functools.cache
+def magnitude(a: int) -> int:
+    """
+    Calculate the power of ten that shifts a number left by its own width
+    :param a: Non-negative number
+    :return: Smallest power of ten greater than a
+    """
+    power = 10
+    while power <= a:
+        power *= 10
+    return power
+
+
 def cat(a: int, b: int) -> int:
     """
     Concatenate a and b
@@ -38,57 +61,219 @@ def cat(a: int, b: int) -> int:
     :param b: Low order operand
     :return: Concatenation of a and b
     """
-    return int(str(a) + str(b))
+    return a * magnitude(b) + b
+
+
+# Returned by an undo function when any value could have come before the operation
+ANY = object()
+
+
+def unmul(value: int, b: int) -> int | object | None:
+    """
+    Undo a multiplication by b
+    :param value: Product
+    :param b: Multiplier
+    :return: Multiplicand, ANY if both are zero, or None if b doesn't divide the product
+    """
+    if b == 0:
+        # Anything times zero is zero
+        return ANY if value == 0 else None
+    if value % b == 0:
+        return value // b
+    return None
 
 
-def operate(fields: list, value: int, target: int) -> bool:
+def unadd(value: int, b: int) -> int | None:
     """
-    Compute the possible values for a list of numbers from left to right (not PEMDAS), and compare to the target value
-    :param fields: List of numbers to operate with
-    :param value: The current accumulated value from previous rounds
-    :param target: Final desired value
-    :return: True if the numbers in fields can achieve the target value
+    Undo an addition of b
+    :param value: Sum
+    :param b: Addend
+    :return: Augend, or None if b is larger than the sum
     """
-    if len(fields) == 0:
-        return value == target
+    if value >= b:
+        return value - b
+    return None
 
-    if value > 0:
-        left, right = value, fields[0]
-        fields = fields[1:]
-    else:
-        left, right = fields[0], fields[1]
-        fields = fields[2:]
 
-    for operation in [mul, add, cat]:
-        intermediate = operation(left, right)
-        if operate(fields, intermediate, target): return True
+def uncat(value: int, b: int) -> int | None:
+    """
+    Undo a concatenation of b
+    :param value: Concatenated value
+    :param b: Low order operand
+    :return: High order operand, or None if value doesn't end with the digits of b
+    """
+    power = magnitude(b)
+    # Concatenating b onto zero leaves b itself
+    if value >= b and value % power == b:
+        return value // power
+    return None
+
+
+# Operators available to the equations by symbol, each with the function that undoes it for the backward search
+OPERATORS = {
+    "*": unmul,
+    "+": unadd,
+    "||": uncat,
+}
+
+# Each part allows a superset of the previous part's operators
+PART_OPERATORS = (("+", "*"), ("+", "*", "||"))
+
+
+def search(target: int, numbers: tuple[int, ...], undos: tuple[Callable[[int, int], int | object | None], ...]) -> bool:
+    """
+    Search for operators that combine the numbers from left to right (not PEMDAS) into the target value.
 
+    The search works backward from the target, undoing the last operation at each step. Only operations
+    that could have produced the current value are undone: a product must divide it, a sum must not exceed
+    it, and a concatenation must match its trailing digits. Values already ruled out are remembered.
+    :param target: Final desired value
+    :param numbers: Numbers to operate with
+    :param undos: Undo functions of the allowed operators
+    :return: True if the numbers can achieve the target value
+    """
+    pending = [(len(numbers) - 1, target)]
+    seen = set()
 
-def main():
-    # data = TEST_INPUT.split("\n")
-    with open("input", "r") as input_file:
-        data = input_file.read().split("\n")
+    while pending:
+        index, value = pending.pop()
+        number = numbers[index]
+        if index == 0:
+            if value == number:
+                return True
+            continue
 
-    sums = 0
-    print("")
-    for line in data:
-        if line == "":
+        if (index, value) in seen:
             continue
+        seen.add((index, value))
+
+        for undo in undos:
+            previous = undo(value, number)
+            if previous is ANY:
+                # The numbers before this one always come to some value
+                return True
+            if previous is not None:
+                pending.append((index - 1, previous))
+
+    return False
+
+
+def compile_plan(tiers: tuple[tuple[str, ...], ...]) -> list[Callable[[int, tuple[int, ...]], bool]]:
+    """
+    Build the search function for each tier of operators.
+    :param tiers: Operator symbols for each tier, each a superset of the previous
+    :return: Search functions for each tier
+    """
+    plan = []
+    previous = set()
+    for tier in tiers:
+        if not previous <= set(tier):
+            raise ValueError(f"Operator tier {tier} does not include every operator from the previous tier")
+        plan.append(functools.partial(search, undos=tuple(OPERATORS[symbol] for symbol in tier)))
+        previous = set(tier)
+
+    return plan
+
 
-        try:
-            values = line.split(":")
-            target = int(values[0])
-            numbers = list(map(int, values[1].split()))
+def parse(text: str | bytes) -> tuple[tuple[int, tuple[int, ...]], ...]:
+    # text = TEST_INPUT
+    try:
+        rows = int_rows(text).tolist()
+    except OverflowError:
+        # Targets can outgrow 64 bits, in which case the equations are read a line at a time into Python ints
+        rows = records(text)
 
-            if operate(numbers, 0, target):
-                sums += target
-        except ValueError as ex:
-            print(f"Line {line} [{values}] is invalid. {ex}")
+    equations = []
+    for number, record in enumerate(rows, 1):
+        if not record:
             continue
 
+        if len(record) < 2:
+            print(f"Line {number} {record} is invalid. It needs a target and at least one number")
+            continue
+
+        target, *numbers = record
+        equations.append((target, tuple(numbers)))
+
+    return tuple(equations)
+
+
+def load(path: Path) -> tuple[tuple[int, tuple[int, ...]], ...]:
+    return parse(map_input(path))
+
+
+def encode(equations: tuple) -> dict:
+    # Targets can outgrow 64 bits, so they are stored as fixed width little-endian integers
+    width = max((target.bit_length() for target, _ in equations), default=0) // 8 + 1
+    numbers, lengths = join_rows([numbers for _, numbers in equations])
+
+    return {
+        "targets": b"".join(target.to_bytes(width, "little") for target, _ in equations),
+        "numbers": numbers,
+        "lengths": lengths,
+    }
+
+
+def decode(fields: dict) -> tuple[tuple[int, tuple[int, ...]], ...]:
+    targets = fields["targets"]
+    rows = split_rows(fields["numbers"], fields["lengths"])
+    width = len(targets) // len(rows) if rows else 0
+
+    return tuple(
+        (int.from_bytes(targets[i * width:(i + 1) * width], "little"), tuple(numbers))
+        for i, numbers in enumerate(rows)
+    )
+
+
+def count_solvable(equations: tuple, tiers: tuple[tuple[str, ...], ...]) -> list[int]:
+    """
+    Sum the targets of the equations that can be solved with each tier of operators, in a single pass.
+    An equation is only searched again with a larger tier when every smaller tier failed to solve it.
+    :param equations: Target value and operand list pairs
+    :param tiers: Operator symbols for each tier, each a superset of the previous
+    :return: Sum of the solvable targets for each tier
+    """
+    plan = compile_plan(tiers)
+    sums = [0] * len(plan)
+
+    for target, numbers in equations:
+        for tier, search in enumerate(plan):
+            if search(target, numbers):
+                # Solvable with these operators means solvable with every larger set
+                for larger in range(tier, len(plan)):
+                    sums[larger] += target
+                break
+
+    return sums
+
+
+def calibrate(equations: tuple, tiers: tuple[tuple[str, ...], ...] = PART_OPERATORS, workers: int = 1) -> tuple[int, ...]:
+    """
+    Sum the targets of the equations that can be solved with each tier of operators, optionally spreading the
+    equations over a process pool.
+    :param equations: Target value and operand list pairs
+    :param tiers: Operator symbols for each tier, each a superset of the previous
+    :param workers: Number of worker processes
+    :return: Calibration result for each tier
+    """
+    if workers > 1:
+        chunks = chunked(equations, workers)
+        with process_pool(workers) as pool:
+            return tuple(map(sum, zip(*pool.map(count_solvable, chunks, [tiers] * len(chunks)))))
+
+    return tuple(count_solvable(equations, tiers))
+
+
+def solve(equations: tuple, workers: int = 1) -> tuple[int, ...]:
+    # Both parts come out of the same tiered pass over the equations
+    return calibrate(equations, PART_OPERATORS, workers)
+
+
+def part1(calibrations: tuple[int, ...]) -> int:
     # Part 1: 2654749936343
-    # Part 2: 124060392153684
-    print(f"Calibration result: {sums}")
+    return calibrations[0]
 
 
-main()
+def part2(calibrations: tuple[int, ...]) -> int:
+    # Part 2: 124060392153684
+    return calibrations[1]
@@ -1,7 +1,18 @@
 #!/usr/bin/env python3
 
 import itertools
+import math
 from collections import defaultdict
+from concurrent.futures import as_completed
+
+from aoc.backends import NUMPY, PYTHON, check_backend
+from aoc.grid import PAD, Grid
+from aoc.parallel import process_pool
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 TEST_INPUT="""............
 ........0...
@@ -18,81 +29,151 @@ TEST_INPUT="""............
 
 TEST_LOCATIONS=14
 
+PARSER_VERSION = 1
+
 
-def map_grid(grid: list[list[str]]) -> defaultdict[list]:
+def map_grid(grid: Grid) -> defaultdict[list]:
     """
-    Walk the grid area searching for antenna frequencies.
+    Search the grid area for antenna frequencies.
     :param grid: The city play, with antenna locations
     :return: Dictionary of locations by frequency
     """
     antennas = defaultdict(list)
 
-    for i in range(len(grid)):
-        for j in range(len(grid[0])):
-            frequency = grid[i][j]
-            if not frequency == ".":
-                antennas[frequency].append((i, j))
+    # Dropping the empty cells and padding leaves one character per antenna
+    for frequency in sorted(set(grid.cells.translate(None, b"." + bytes([PAD])))):
+        antennas[chr(frequency)] = [grid.position(index) for index in grid.find_all(frequency)]
 
     return antennas
 
 
-def main():
-    # data = TEST_INPUT.strip().split("\n")
-    data = open("input", "r").read().strip().split("\n")
+def line_span(position: int, step: int, size: int) -> tuple[int, int]:
+    """
+    Count the steps available from a position before leaving the grid along one axis.
+    :param position: Row or column of the starting point
+    :param step: Row or column change per step
+    :param size: Number of rows or columns in the grid
+    :return: Tuple of the steps available backward and forward
+    """
+    if step > 0:
+        return position // step, (size - 1 - position) // step
+    if step < 0:
+        return (size - 1 - position) // -step, position // -step
+    return math.inf, math.inf
+
+
+def frequency_antinodes(sites: list[tuple[int, int]], rows: int, cols: int, resonant: bool, backend: str = PYTHON):
+    """
+    Mark the antinodes cast by the antennas of one frequency, without touching the grid.
+
+    Without resonance, each pair of antennas casts one antinode beyond each antenna. With resonance, the
+    antinodes cover every grid position in line with the pair. The pair's offset is reduced by its greatest
+    common divisor so no in-line position is skipped, and each line is written with a single strided slice
+    of the flat bitmap.
+    :param sites: Row, column positions of the frequency's antennas
+    :param rows: Number of rows in the grid
+    :param cols: Number of columns in the grid
+    :param resonant: Extend antinodes to every position in line with a pair
+    :param backend: Bitmap implementation, python for a bytearray or numpy for a bool array
+    :return: Flat bitmap of rows * cols cells, non-zero where there is an antinode
+    """
+    bitmap = np.zeros(rows * cols, dtype=bool) if backend == NUMPY else bytearray(rows * cols)
+
+    for a, b in itertools.combinations(sites, 2):
+        slope = (b[0] - a[0], b[1] - a[1])
+
+        if not resonant:
+            for x, y in ((a[0] - slope[0], a[1] - slope[1]), (b[0] + slope[0], b[1] + slope[1])):
+                if 0 <= x < rows and 0 <= y < cols:
+                    bitmap[x * cols + y] = 1
+            continue
+
+        divisor = math.gcd(*slope)
+        step = (slope[0] // divisor, slope[1] // divisor)
+        # Walk so the flat index increases, which keeps the slice bounds non-negative
+        if step[0] < 0 or (step[0] == 0 and step[1] < 0):
+            step = (-step[0], -step[1])
+
+        row_back, row_forward = line_span(a[0], step[0], rows)
+        col_back, col_forward = line_span(a[1], step[1], cols)
+        back = min(row_back, col_back)
+        count = back + min(row_forward, col_forward) + 1
+
+        flat_step = step[0] * cols + step[1]
+        start = (a[0] - back * step[0]) * cols + (a[1] - back * step[1])
+        line = slice(start, start + (count - 1) * flat_step + 1, flat_step)
+        bitmap[line] = True if backend == NUMPY else b"\x01" * count
 
-    grid = []
-    for line in data:
-        grid.append(list(line))
+    return bitmap
+
+
+def merge(bitmap, other):
+    """
+    Combine two antinode bitmaps.
+    :param bitmap: Flat antinode bitmap
+    :param other: Flat antinode bitmap of the same size
+    :return: Bitmap with the antinodes from both
+    """
+    if np is not None and isinstance(bitmap, np.ndarray):
+        return bitmap | other
 
-    rows = len(grid)
-    cols = len(grid[0])
+    # Each cell is 0 or 1, so OR-ing the bitmaps as integers OR-s every cell at C speed
+    return bytearray((int.from_bytes(bitmap, "little") | int.from_bytes(other, "little")).to_bytes(len(bitmap), "little"))
+
+
+def find_antinodes(grid: Grid, resonant: bool, workers: int = 1, backend: str = PYTHON):
+    """
+    Mark the antinodes of every frequency, optionally one frequency per worker process.
+    :param grid: The city plan, with antenna locations
+    :param resonant: Extend antinodes to every position in line with a pair
+    :param workers: Number of worker processes
+    :param backend: Bitmap implementation, python or numpy
+    :return: Flat bitmap of every antinode
+    """
+    rows = grid.rows
+    cols = grid.cols
     antennas = map_grid(grid)
+    combined = np.zeros(rows * cols, dtype=bool) if backend == NUMPY else bytearray(rows * cols)
+
+    if workers > 1:
+        with process_pool(workers) as pool:
+            futures = [
+                pool.submit(frequency_antinodes, sites, rows, cols, resonant, backend) for sites in antennas.values()
+            ]
+            for future in as_completed(futures):
+                combined = merge(combined, future.result())
+        return combined
+
+    for sites in antennas.values():
+        combined = merge(combined, frequency_antinodes(sites, rows, cols, resonant, backend))
+
+    return combined
+
+
+def count_antinodes(bitmap) -> int:
+    if np is not None and isinstance(bitmap, np.ndarray):
+        return int(bitmap.sum())
+    return len(bitmap) - bitmap.count(0)
 
-    # Debugging: Print antenna sites
-    # for antenna in antennas:
-    #     print(f"{antenna}: {antennas[antenna]}")
-
-    antinodes = set()
-    for antenna in antennas:
-        for a, b in itertools.combinations(antennas[antenna], 2):
-            # For part 2, antipoles extend to the end of the grid
-            # and include antenna sites
-            slope = (b[0] - a[0], b[1]-a[1])
-
-            # Add the antenna sites themselves
-            antinodes.add(a)
-            antinodes.add(b)
-
-            # Negative slope
-            (x, y) = (a[0] - slope[0], a[1] - slope[1])
-            while True:
-                if not (0<= x < rows and 0 <= y < cols):
-                    break
-                if grid[x][y] == "." or grid[x][y] == antenna:
-                    antinodes.add((x, y))
-                    grid[x][y] = "#"
-                (x, y) = (x - slope[0], y - slope[1])
-
-            # Positive slope
-            (x, y) = (b[0] + slope[0], b[1] + slope[1])
-            while True:
-                if not (0<= x < rows and 0 <= y < cols):
-                    break
-                if grid[x][y] == "." or grid[x][y] == antenna:
-                    antinodes.add((x, y))
-                    grid[x][y] = "#"
-                (x, y) = (x + slope[0], y + slope[1])
-
-    # Debugging: Print the grid with antinodes
-    # for antinode in antinodes:
-    #     if grid[antinode[0]][antinode[1]] == ".":
-    #         grid[antinode[0]][antinode[1]] = "#"
-    for row in grid:
-        print(f"{row}")
 
+def parse(text: str) -> Grid:
+    # text = TEST_INPUT
+    return Grid.parse(text)
+
+
+def encode(grid: Grid) -> dict:
+    return grid.fields()
+
+
+def decode(fields: dict) -> Grid:
+    return Grid.from_fields(fields)
+
+
+def part1(grid: Grid, workers: int = 1, backend: str = PYTHON) -> int:
     # Part 1: 327
-    # Part 2: 1233
-    print(f"Antinodes: {len(antinodes)}")
+    return count_antinodes(find_antinodes(grid, False, workers, check_backend(backend)))
 
 
-main()
+def part2(grid: Grid, workers: int = 1, backend: str = PYTHON) -> int:
+    # Part 2: 1233
+    return count_antinodes(find_antinodes(grid, True, workers, check_backend(backend)))
@@ -0,0 +1,21 @@
+import random
+
+from aoc.generate import day06, guard_route
+
+
+def day06_route(scale: int) -> int:
+    lines = [bytearray(line.encode()) for line in day06(scale, random.Random(2024)).splitlines()]
+    row = next(number for number, line in enumerate(lines) if b"^" in line)
+    col = lines[row].index(b"^")
+
+    route = guard_route(lines, row, col)
+    assert route is not None, "the generated guard patrols in a loop"
+    return len(route)
+
+
+def test_day06_route_grows_with_scale():
+    routes = [day06_route(scale) for scale in (1, 4, 16)]
+    # The real input's route covers 4939 cells
+    assert routes[0] > 4000
+    for smaller, larger in zip(routes, routes[1:]):
+        assert larger > 3 * smaller